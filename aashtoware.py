@@ -1,7 +1,13 @@
 import streamlit as st
-from datetime import datetime, date
-import time
-from agol_util import select_record, AGOLRecordLoader, AGOLDataLoader
+from agol_util import refresh_record_fields, AGOLRecordLoader, AGOLDataLoader
+from record_store import get_field_value, session_record
+from startup_metrics import lazy_import
+from prefetch import RECORD_MAX_AGE
+from layer_schema import get_layer_schema, coerce_record, to_date
+from value_lists import value_list
+from notifications import notify
+from aashtoware_sync import AWP_KEY, FIELD_MAP, PROJECT_KEY, reconcile
+from agol_query import eq
 
 # ---------------------------------------------------------
 # Build and send an update payload to AGOL
@@ -12,36 +18,61 @@ def update_section_to_agol(prefix, section, rows):
     for row in rows:
         for field in row:
             field_name = field["name"]
-            key = f"{prefix}_{field_name}"
-            attributes[field_name] = st.session_state.get(key, None)
+            attributes[field_name] = get_field_value(prefix, field_name)
 
-    objectid_key = f"{prefix}_objectid"
-    attributes["OBJECTID"] = st.session_state.get(objectid_key)
+    attributes["OBJECTID"] = get_field_value(prefix, "objectid")
+
+    # Dates → epoch-ms, numerics → numbers, domain names → codes
+    schema = get_layer_schema(st.session_state["projects_url"])
+    attributes = coerce_record(attributes, schema, to_agol=True)
 
     payload = {"attributes": attributes}
-    st.session_state[f"{section}_last_payload"] = payload
+
+    # Values before the edit, for the change log
+    record = session_record(prefix)
+    previous = dict(record.attributes) if record is not None else {}
 
     loader = AGOLDataLoader(st.session_state["projects_url"])
     result = loader.update_features(payload)
 
-    st.session_state[f"{section}_agol_result"] = result
+    # Re-read just this card's fields into the shared record
+    if result.get("success"):
+        try:
+            # Imported on first save; it isn't needed to render the page
+            change_log = lazy_import("change_log")
+            change_log.get_change_log().record(
+                st.session_state["guid"], section, change_log.changed_fields(previous, attributes, schema)
+            )
+        except Exception as e:
+            notify(f"Saved, but the change could not be logged: {e}", "warning")
+        refresh_record_fields(st.session_state["projects_url"], st.session_state["guid"],
+                              [field["name"] for row in rows for field in row])
+
+    # Only the most recent update is kept for the session
+    st.session_state["last_update"] = {
+        "section": section,
+        "payload": payload,
+        "result": result
+    }
     return result
 
 
 
 # ---------------------------------------------------------
 # Render a section (always edit mode)
+#
+# Each card is a fragment: editing a field or clicking UPDATE reruns
+# only this card (and only its own AGOL calls), not the whole app.
 # ---------------------------------------------------------
+@st.fragment
 def render_section(section_name, data_prefix, widget_prefix, rows, on_save=None):
 
     # Always force edit mode
     edit_key = f"{widget_prefix}_edit_mode"
     st.session_state[edit_key] = True
 
-    # Keys for success/error messages
-    msg_key = f"{widget_prefix}_update_msg"
-    msg_type_key = f"{widget_prefix}_update_type"
-    msg_time_key = f"{widget_prefix}_update_time"
+    # Field types and domains come from the layer schema unless declared
+    schema = get_layer_schema(st.session_state["projects_url"])
 
     with st.expander(f"**{section_name}**", expanded=True):
 
@@ -56,8 +87,13 @@ def render_section(section_name, data_prefix, widget_prefix, rows, on_save=None)
                 data_key = f"{data_prefix}_{field_name}"
                 widget_key = f"{widget_prefix}_{field_name}"
 
-                # Pull current value safely
-                current_value = st.session_state.get(data_key, "")
+                # Pull current value safely (pending edit or shared record)
+                current_value = get_field_value(data_prefix, field_name, "")
+                field_info = schema.field(field_name) if schema else None
+
+                # Show coded-value domains by their display name
+                if field_info and field_info.domain:
+                    current_value = field_info.domain.get(current_value, current_value)
 
                 # Fix: ensure text_area receives a string, not None or NaN
                 if current_value is None:
@@ -65,7 +101,7 @@ def render_section(section_name, data_prefix, widget_prefix, rows, on_save=None)
                 else:
                     current_value = str(current_value)
 
-                field_type = field.get("type", "text")
+                field_type = field.get("type") or (field_info.widget_type if field_info else "text")
 
                 if field_type == "text":
                     col.text_input(label, value=current_value, key=widget_key)
@@ -80,7 +116,7 @@ def render_section(section_name, data_prefix, widget_prefix, rows, on_save=None)
                     )
 
                 elif field_type == "select":
-                    options = field.get("options", [])
+                    options = field.get("options") or (schema.options(field_name) if schema else [])
                     col.selectbox(
                         label,
                         options,
@@ -90,9 +126,10 @@ def render_section(section_name, data_prefix, widget_prefix, rows, on_save=None)
 
                 elif field_type == "number":
                     # Convert stored value into a usable number
+                    raw_number = get_field_value(data_prefix, field_name)
                     try:
-                        num_value = float(st.session_state.get(data_key)) \
-                            if st.session_state.get(data_key) not in (None, "", "None") else 0.0
+                        num_value = float(raw_number) \
+                            if raw_number not in (None, "", "None") else 0.0
                     except:
                         num_value = 0.0
 
@@ -100,116 +137,94 @@ def render_section(section_name, data_prefix, widget_prefix, rows, on_save=None)
 
 
                 elif field_type == "date":
-                    raw = current_value
-
-                    # Convert "2025-12-10" → datetime.date
-                    if isinstance(raw, str) and raw.strip():
-                        try:
-                            raw = __import__("datetime").datetime.strptime(raw, "%Y-%m-%d").date()
-                        except:
-                            raw = None
-
-                    # Convert epoch milliseconds → datetime.date
-                    elif isinstance(raw, (int, float)):
-                        try:
-                            raw = __import__("datetime").datetime.utcfromtimestamp(raw / 1000).date()
-                        except:
-                            raw = None
-
-                    # Ensure final value is a date or None
-                    if not isinstance(raw, __import__("datetime").date):
-                        raw = None
-
-                    col.date_input(label, value=raw, key=widget_key)
+                    col.date_input(label, value=to_date(current_value), key=widget_key)
 
                 # Sync widget value back to real data key (SAFE VERSION)
                 if widget_key in st.session_state:
                     st.session_state[data_key] = st.session_state[widget_key]
 
-        # UPDATE BUTTON + MESSAGE
-        col_btn, col_msg = st.columns([1, 6])
+        # UPDATE BUTTON (result shown as a toast that expires in the browser)
+        if st.button("UPDATE", key=f"save_{widget_prefix}"):
 
-        with col_btn:
-            if st.button("UPDATE", key=f"save_{widget_prefix}"):
+            result = on_save(data_prefix, section_name.lower(), rows)
 
-                result = on_save(data_prefix, section_name.lower(), rows)
+            # Correct success detection
+            if isinstance(result, dict) and result.get("success") is True:
+                notify(f"{section_name} saved.", "success")
+            else:
+                notify(f"{section_name} update failed: {result}", "error")
 
-                # Correct success detection
-                if isinstance(result, dict) and result.get("success") is True:
-                    st.session_state[msg_key] = "success"
-                    st.session_state[msg_type_key] = "success"
-                else:
-                    st.session_state[msg_key] = f"{result}"
-                    st.session_state[msg_type_key] = "error"
-
-                st.session_state[msg_time_key] = time.time()
-                st.rerun()
-
-        # DISPLAY MESSAGE + AUTO-HIDE
-        with col_msg:
-            msg_type = st.session_state.get(msg_type_key)
-            msg = st.session_state.get(msg_key)
-            msg_time = st.session_state.get(msg_time_key)
-
-            if msg_type and msg_time:
-
-                # Auto-hide after 3 seconds
-                if time.time() - msg_time > 3:
-                    st.session_state[msg_key] = None
-                    st.session_state[msg_type_key] = None
-                    st.session_state[msg_time_key] = None
-                    st.rerun()
-
-                # SUCCESS → green checkmark only
-                if msg_type == "success":
-                    st.markdown(
-                        "<span style='font-size:24px; color:green;'>&#10004;</span>",
-                        unsafe_allow_html=True
-                    )
 
-                # ERROR → show full error message
-                elif msg_type == "error":
-                    st.error(f"Update failed: {msg}")
 
 
+def sync_record_from_aashtoware():
+    """
+    Re-read the synced fields into the shared record and drop pending
+    edits of them, so the card shows the values just pulled from AWP.
+    """
+    fields = list(FIELD_MAP)
+    refresh_record_fields(st.session_state["projects_url"], st.session_state["guid"], fields)
+    for field_name in fields:
+        st.session_state.pop(f"aashtoware_{field_name}", None)
+        st.session_state.pop(f"aashtoware_identification_{field_name}", None)
 
 
 def aashtoware_tab():
 
+    live_updates = st.toggle("Live AASHTOWare Updates")
+
     # Load AGOL data only when not editing ANY information section
     if not any(k.endswith("aashtoware_edit_mode") and st.session_state[k] for k in st.session_state):
-        AGOLRecordLoader(
+        loader = AGOLRecordLoader(
             url=st.session_state["projects_url"],
             id_field="globalid",
             id_value=st.session_state["guid"],
             prefix="aashtoware",
             fields="*",
-            return_geometry=False
+            return_geometry=False,
+            max_age=RECORD_MAX_AGE
         )
-
-    live_updates = st.toggle("Live AASHTOWare Updates")
+        if loader.stale:
+            st.warning("ArcGIS Online is not responding; showing the last saved copy of this project.")
+
+    # Pull AWP values into this project once per project while live updates are on
+    if live_updates and not st.session_state.get("aashtoware_live_synced"):
+        record = session_record("aashtoware")
+        iris = record.get(PROJECT_KEY) if record is not None else None
+        try:
+            if iris:
+                summary = reconcile(
+                    project_where=eq("globalid", st.session_state["guid"]),
+                    awp_where=eq(AWP_KEY, str(iris).strip())
+                )
+                if summary["changed_fields"]:
+                    sync_record_from_aashtoware()
+                    st.info(f"Applied {summary['changed_fields']} update(s) from AASHTOWare.")
+            st.session_state["aashtoware_live_synced"] = True
+        except Exception as e:
+            st.error(f"AASHTOWare sync failed: {e}")
 
     # IDENTIFICATION
     aashtoware_rows = [
         [
-            {"name": "iris", "label": "IRIS", "type": "text"},
+            {"name": "iris", "label": "IRIS"},
         ],
         [
-            {"name": "awp_proj_name", "label": "AASHTOWare Project Name", "type": "text"}
+            {"name": "awp_proj_name", "label": "AASHTOWare Project Name"}
         ],
         [
             {"name": "fund_type", "label": "Funding Type", "type": "select",
-             "options": st.session_state['funding']},
+             "options": value_list("funding")},
              {"name": "proj_prac", "label": "Practice", "type": "select",
-             "options": st.session_state['practice']}
+             "options": value_list("practice")}
         ],
         [
             {"name": "award_date", "label": "Award Date", "type": "date"},
             {"name": "award_fiscal_year", "label": "Awarded Fiscal Year", "type": "select",
-             "options": st.session_state['fiscal_year']}
+             "options": value_list("fiscal_year")}
         ],
         [
-            {"name": "contractor", "label": "Awarded Contractor", "type": "text"},
+            {"name": "contractor", "label": "Awarded Contractor"},
         ],
         [
             {"name": "awarded_amount", "label": "Award Date", "type": "number"},
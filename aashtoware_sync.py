@@ -0,0 +1,233 @@
+"""
+Reconcile APEX projects against the AASHTOWare (AWP) export layer.
+
+Both layers are loaded as schema-typed frames (agol_frames.query_frame),
+joined on IRIS through a hash index (pandas merge) and compared field by field. Only rows with real changes
+are pushed back to the projects layer through chunked applyEdits.
+
+Run headless (e.g. from cron):  python aashtoware_sync.py [--dry-run]
+"""
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from init_session import APEX_URLS
+from agol_util import format_guid, AGOLDataLoader
+from agol_frames import query_frame
+from layer_schema import get_layer_schema
+from change_log import get_change_log
+
+
+logger = logging.getLogger("aashtoware_sync")
+
+# Join key on each side
+PROJECT_KEY = "iris"
+AWP_KEY = "iris"
+
+# Projects field → AWP export field
+FIELD_MAP = {
+    "awp_proj_name": "awp_proj_name",
+    "contractor": "contractor",
+    "award_date": "award_date",
+    "award_fiscal_year": "award_fiscal_year",
+    "awarded_amount": "awarded_amount",
+    "current_contract_amount": "current_contract_amount",
+    "amount_paid_to_date": "amount_paid_to_date",
+    "tenadd": "tenadd",
+}
+
+DATE_FIELDS = {"award_date", "tenadd"}
+AMOUNT_FIELDS = {"awarded_amount", "current_contract_amount", "amount_paid_to_date"}
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+
+# ---------------------------------------------------------
+# Streaming loaders
+# ---------------------------------------------------------
+def _load_frame(url: str, fields: list, where: str = "1=1") -> pd.DataFrame:
+    """
+    Schema-typed frame (agol_frames.query_frame) of the requested fields,
+    with lower-case column names and dates as epoch-ms for the diff.
+    """
+    schema = get_layer_schema(url)
+    names = [schema.field(f).name if schema and schema.field(f) else f for f in fields]
+
+    frame = query_frame(url, where=where, fields=names, schema=schema)
+    frame.columns = [c.lower() for c in frame.columns]
+    for column in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[column]):
+            frame[column] = _epoch_ms(frame[column])
+    return frame
+
+
+def _epoch_ms(series: pd.Series) -> pd.Series:
+    if series.dt.tz is None:
+        series = series.dt.tz_localize("UTC")
+    return ((series - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)).astype("Int64")
+
+
+def _normalize_key(series: pd.Series) -> pd.Series:
+    return series.astype("string").str.strip().str.upper()
+
+
+
+# ---------------------------------------------------------
+# Diffing
+# ---------------------------------------------------------
+def _changed(field: str, current: pd.Series, incoming: pd.Series) -> pd.Series:
+    """Vectorized "does AWP hold a different, non-empty value" mask."""
+    if field in AMOUNT_FIELDS:
+        cur = pd.to_numeric(current, errors="coerce").round(2)
+        new = pd.to_numeric(incoming, errors="coerce").round(2)
+    elif field in DATE_FIELDS:
+        cur = pd.to_numeric(current, errors="coerce") // DAY_MS
+        new = pd.to_numeric(incoming, errors="coerce") // DAY_MS
+    else:
+        cur = current.astype("string").str.strip()
+        new = incoming.astype("string").str.strip().replace("", pd.NA)
+
+    # Never blank out a project value because AWP has nothing
+    return (new.notna() & (cur.isna() | (cur != new))).fillna(False).astype(bool)
+
+
+def compute_diffs(projects: pd.DataFrame, awp: pd.DataFrame) -> pd.DataFrame:
+    """
+    Long-format diff: one row per (project, field) that differs.
+    Columns: objectid, globalid, iris, field, old, new
+    """
+    projects = projects.assign(_key=_normalize_key(projects[PROJECT_KEY]))
+    awp = awp.assign(_key=_normalize_key(awp[AWP_KEY])).dropna(subset=["_key"])
+    awp = awp.drop_duplicates("_key", keep="last")
+
+    awp_columns = {awp_field.lower(): f"{field}__awp" for field, awp_field in FIELD_MAP.items()}
+    joined = projects.merge(
+        awp[["_key", *awp_columns]].rename(columns=awp_columns),
+        on="_key",
+        how="inner"
+    )
+
+    diffs = []
+    for field in FIELD_MAP:
+        incoming = joined[f"{field}__awp"]
+        mask = _changed(field, joined[field], incoming)
+        if mask.any():
+            diffs.append(pd.DataFrame({
+                "objectid": joined.loc[mask, "objectid"].values,
+                "globalid": joined.loc[mask, "globalid"].values,
+                "iris": joined.loc[mask, PROJECT_KEY].values,
+                "field": field,
+                "old": joined.loc[mask, field].values,
+                "new": incoming[mask].values,
+            }))
+
+    if not diffs:
+        return pd.DataFrame(columns=["objectid", "globalid", "iris", "field", "old", "new"])
+    return pd.concat(diffs, ignore_index=True)
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+
+def build_updates(diffs: pd.DataFrame) -> list:
+    """Collapse the long diff into one applyEdits update per project."""
+    updates = {}
+    for objectid, field, new in zip(diffs["objectid"], diffs["field"], diffs["new"]):
+        oid = int(objectid)
+        updates.setdefault(oid, {"OBJECTID": oid})[field] = _json_value(new)
+    return [{"attributes": attrs} for attrs in updates.values()]
+
+
+
+def _log_changes(diffs: pd.DataFrame, result: dict):
+    """Append the fields of every successfully updated project to the change log."""
+    updated = {format_guid(g) for g in result.get("globalids") or []}
+    rows = [
+        (guid, "aashtoware sync", field, _json_value(old), _json_value(new))
+        for guid, field, old, new in zip(diffs["globalid"], diffs["field"], diffs["old"], diffs["new"])
+        if format_guid(guid) in updated
+    ]
+    get_change_log().record_many(rows)
+
+
+
+# ---------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------
+def reconcile(project_where: str = "1=1", awp_where: str = "1=1", dry_run: bool = False,
+              chunk_size: int = 500) -> dict:
+    """
+    Pull AWP values into the projects layer.
+
+    Returns a summary with timings, the diff rows and the applyEdits result
+    (None for dry runs or when nothing changed).
+    """
+    started = time.perf_counter()
+
+    projects = _load_frame(
+        APEX_URLS["projects_url"], ["OBJECTID", "GlobalID", PROJECT_KEY, *FIELD_MAP], where=project_where
+    )
+    awp = _load_frame(
+        APEX_URLS["aashtoware_url"], [AWP_KEY, *FIELD_MAP.values()], where=awp_where
+    )
+    loaded = time.perf_counter()
+
+    diffs = compute_diffs(projects, awp)
+    updates = build_updates(diffs)
+    diffed = time.perf_counter()
+
+    result = None
+    if updates and not dry_run:
+        result = AGOLDataLoader(APEX_URLS["projects_url"]).update_features_batch(updates, chunk_size)
+        _log_changes(diffs, result)
+
+    return {
+        "projects": len(projects),
+        "awp_rows": len(awp),
+        "changed_fields": len(diffs),
+        "changed_projects": len(updates),
+        "dry_run": dry_run,
+        "timings": {
+            "load": round(loaded - started, 3),
+            "diff": round(diffed - loaded, 3),
+            "push": round(time.perf_counter() - diffed, 3),
+        },
+        "diffs": diffs,
+        "result": result,
+    }
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconcile APEX projects with the AASHTOWare export.")
+    parser.add_argument("--dry-run", action="store_true", help="compute diffs without writing to AGOL")
+    parser.add_argument("--where", default="1=1", help="limit the projects considered")
+    parser.add_argument("--chunk-size", type=int, default=500, help="features per applyEdits call")
+    parser.add_argument("--diff-csv", help="write the per-field diff to this CSV file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    summary = reconcile(project_where=args.where, dry_run=args.dry_run, chunk_size=args.chunk_size)
+
+    if args.diff_csv:
+        summary["diffs"].to_csv(args.diff_csv, index=False)
+
+    summary.pop("diffs")
+    print(json.dumps(summary, default=str, indent=2))
+
+    result = summary["result"]
+    return 0 if result is None or result["success"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
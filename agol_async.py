@@ -0,0 +1,249 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+
+from agol_json import decode_response
+from agol_query import eq
+from init_session import load_credentials
+
+
+# Shared connection limits for every coroutine using the client
+MAX_CONNECTIONS = 16
+REQUEST_TIMEOUT = 60
+
+TOKEN_URL = "https://www.arcgis.com/sharing/rest/generateToken"
+
+# Refresh tokens this many seconds before AGOL says they expire
+TOKEN_MARGIN = 60
+
+
+
+def _raise_for_error(data: dict):
+    if "error" in data:
+        raise Exception(f"API Error: {data['error']['message']} - {data['error'].get('details', [])}")
+
+
+# ---------------------------------------------------------
+# Async client
+# ---------------------------------------------------------
+class AsyncAGOLClient:
+    """
+    Awaitable counterparts of the agol_util helpers.
+
+    One httpx.AsyncClient (connection pool) and one semaphore are shared by
+    every call, so fan-out workloads run concurrently without exceeding
+    MAX_CONNECTIONS outstanding requests. Tokens are reused until expiry.
+
+        async with AsyncAGOLClient() as client:
+            records = await asyncio.gather(*(client.select_record(url, "globalid", g) for g in guids))
+    """
+
+    def __init__(self, max_connections: int = MAX_CONNECTIONS, timeout: float = REQUEST_TIMEOUT):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._http = None
+        self._semaphore = None
+        self._token = None
+        self._token_expires = 0
+        self._token_lock = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+            self._token_lock = asyncio.Lock()
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    # ---------------------------------------------------------
+    # Transport
+    # ---------------------------------------------------------
+    async def _post(self, url: str, data: dict) -> dict:
+        await self.open()
+        async with self._semaphore:
+            response = await self._http.post(url, data=data)
+
+        if response.status_code != 200:
+            raise Exception(f"Request failed with status code {response.status_code}: {response.text}")
+
+        data = decode_response(response)
+        _raise_for_error(data)
+        return data
+
+    async def get_token(self) -> str:
+        await self.open()
+        async with self._token_lock:
+            if self._token and time.time() < self._token_expires - TOKEN_MARGIN:
+                return self._token
+
+            username, password = load_credentials()
+            data = await self._post(TOKEN_URL, {
+                "username": username,
+                "password": password,
+                "referer": "https://www.arcgis.com",
+                "f": "json"
+            })
+            if "token" not in data:
+                raise ValueError("Unexpected response format: Token not found.")
+
+            self._token = data["token"]
+            self._token_expires = data.get("expires", 0) / 1000 or time.time() + 3600
+            return self._token
+
+    async def _query(self, url: str, params: dict) -> dict:
+        params = {"f": "json", "token": await self.get_token(), **params}
+        return await self._post(f"{url}/query", params)
+
+    # ---------------------------------------------------------
+    # Queries
+    # ---------------------------------------------------------
+    async def query(self, url: str, where: str = "1=1", fields="*", return_geometry=False,
+                    page_size: int = 2000) -> list:
+        """All matching features, paging with resultOffset."""
+        out_fields = ",".join(fields) if isinstance(fields, (list, tuple)) else fields
+        features = []
+        offset = 0
+
+        while True:
+            data = await self._query(url, {
+                "where": where,
+                "outFields": out_fields,
+                "returnGeometry": str(return_geometry).lower(),
+                "outSR": 4326,
+                "orderByFields": "OBJECTID",
+                "resultOffset": offset,
+                "resultRecordCount": page_size,
+            })
+            page = data.get("features", [])
+            features.extend(page)
+            if not page or not data.get("exceededTransferLimit"):
+                return features
+            offset += len(page)
+
+    async def get_multiple_fields(self, url: str, fields: list = None) -> list:
+        features = await self.query(url, fields=fields or "*")
+        return [feature.get("attributes", {}) for feature in features]
+
+    async def select_record(self, url: str, id_field: str, id_value: str, fields="*",
+                            return_geometry=False) -> list:
+        data = await self._query(url, {
+            "where": eq(id_field, id_value),
+            "outFields": fields,
+            "returnGeometry": str(return_geometry).lower(),
+            "outSR": 4326,
+        })
+        return data.get("features", [])
+
+    async def intersect(self, url: str, geometry: dict, geometry_type: str, fields="*",
+                        return_geometry=False) -> list:
+        """Features intersecting an Esri JSON geometry (see AGOLQueryIntersect)."""
+        data = await self._query(url, {
+            "geometry": json.dumps(geometry),
+            "geometryType": geometry_type,
+            "inSR": 4326,
+            "spatialRel": "esriSpatialRelIntersects",
+            "where": "1=1",
+            "outFields": fields,
+            "returnGeometry": str(return_geometry).lower(),
+            "outSR": 4326,
+        })
+        return data.get("features", [])
+
+    # ---------------------------------------------------------
+    # Edits
+    # ---------------------------------------------------------
+    async def apply_edits(self, url: str, adds: list = None, updates: list = None,
+                          deletes: list = None) -> dict:
+        data = {"f": "json", "token": await self.get_token()}
+        if adds:
+            data["adds"] = json.dumps(adds)
+        if updates:
+            data["updates"] = json.dumps(updates)
+        if deletes:
+            data["deletes"] = ",".join(str(d) for d in deletes)
+        return await self._post(f"{url.rstrip('/')}/applyEdits", data)
+
+    async def apply_edits_chunked(self, url: str, updates: list, chunk_size: int = 500) -> list:
+        """Concurrent applyEdits over chunks of updates; returns every updateResult."""
+        chunks = [updates[i:i + chunk_size] for i in range(0, len(updates), chunk_size)]
+        results = await asyncio.gather(*(self.apply_edits(url, updates=c) for c in chunks))
+        return [r for result in results for r in result.get("updateResults", [])]
+
+    async def delete_project(self, url: str, globalid: str) -> bool:
+        data = await self._post(f"{url.rstrip('/')}/deleteFeatures", {
+            "where": eq("GlobalID", globalid),
+            "f": "json",
+            "token": await self.get_token(),
+        })
+        return all(r.get("success", False) for r in data.get("deleteResults", []))
+
+
+
+# ---------------------------------------------------------
+# Sync wrappers (one background event loop per process)
+# ---------------------------------------------------------
+_loop = None
+_loop_lock = threading.Lock()
+_client = None
+_client_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="agol-async", daemon=True).start()
+        return _loop
+
+
+def get_client() -> AsyncAGOLClient:
+    """Process-wide client bound to the background loop."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AsyncAGOLClient()
+        return _client
+
+
+def run_sync(coro):
+    """Run a coroutine on the shared loop from any (non-async) thread."""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+def gather_sync(*coros):
+    """Run several coroutines concurrently and wait for all of them."""
+    async def _gather():
+        return await asyncio.gather(*coros)
+    return run_sync(_gather())
+
+
+def select_record(url: str, id_field: str, id_value: str, fields="*", return_geometry=False):
+    return run_sync(get_client().select_record(url, id_field, id_value, fields, return_geometry))
+
+
+def get_multiple_fields(url: str, fields: list = None) -> list:
+    return run_sync(get_client().get_multiple_fields(url, fields))
+
+
+def query_many(url: str, wheres: list, fields="*", return_geometry=False) -> list:
+    """Run one paged query per where clause concurrently; returns their feature lists in order."""
+    client = get_client()
+    return gather_sync(*(client.query(url, where, fields, return_geometry) for where in wheres))
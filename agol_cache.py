@@ -0,0 +1,253 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse
+
+import requests
+import streamlit as st
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+logger = logging.getLogger("agol_cache")
+
+# Results younger than this are returned without revalidating
+FRESH_FOR = 60
+
+# Results older than this are never served, even during an outage
+STALE_FOR = 24 * 60 * 60
+
+# Circuit breaker tuning
+FAILURE_THRESHOLD = 3
+BASE_BACKOFF = 5
+MAX_BACKOFF = 5 * 60
+
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of calling an endpoint whose breaker is open."""
+
+
+class ServerError(Exception):
+    """AGOL answered with an HTTP 5xx status."""
+
+    def __init__(self, status_code: int, text: str = ""):
+        super().__init__(f"Request failed with status code {status_code}: {text}")
+        self.status_code = status_code
+
+
+def is_outage(error: BaseException) -> bool:
+    """
+    True when error (or anything it was raised from) means AGOL could not
+    answer: transport failures, timeouts and 5xx responses. Bad input and
+    API errors for a single request are not outages.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, (requests.RequestException, ConnectionError, TimeoutError, ServerError)):
+            return True
+        if httpx is not None and isinstance(error, httpx.TransportError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+
+# ---------------------------------------------------------
+# Circuit breaker (one per AGOL host)
+# ---------------------------------------------------------
+class CircuitBreaker:
+    """
+    closed → open after FAILURE_THRESHOLD consecutive outages (see
+    is_outage; bad input never trips it).
+    While open, calls fail fast until the backoff elapses; then a single
+    trial call is let through (half-open). Each failed trial doubles the
+    backoff up to MAX_BACKOFF.
+    """
+
+    def __init__(self, threshold: int = FAILURE_THRESHOLD, base_backoff: float = BASE_BACKOFF,
+                 max_backoff: float = MAX_BACKOFF):
+        self.threshold = threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.opened_at = None
+        self.backoff = base_backoff
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.time() - self.opened_at >= self.backoff:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.backoff = self.base_backoff
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running:
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+                self.opened_at = time.time()
+            elif self.failures >= self.threshold:
+                self.opened_at = time.time()
+            self._trial_running = False
+
+    def call(self, fn: Callable, *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpenError("ArcGIS Online is unavailable; retrying later.")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            # Only outages count; any other error means the host answered
+            if is_outage(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+
+
+# ---------------------------------------------------------
+# Stale-while-revalidate cache
+# ---------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class CachedResult:
+    value: Any
+    fetched_at: float
+    stale: bool = False
+    error: Optional[str] = None
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class SWRCache:
+    """
+    Serves the last good result immediately and refreshes it in the
+    background; during an outage the stale result keeps being served.
+    """
+
+    def __init__(self, fresh_for: float = FRESH_FOR, stale_for: float = STALE_FOR, workers: int = 4):
+        self.fresh_for = fresh_for
+        self.stale_for = stale_for
+        self._entries = {}
+        self._breakers = {}
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="swr")
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlparse(url).netloc or url
+        with self._lock:
+            return self._breakers.setdefault(host, CircuitBreaker())
+
+    def _fetch(self, key, url: str, fetch: Callable) -> CachedResult:
+        value = self.breaker(url).call(fetch)
+        entry = CachedResult(value, time.time())
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def _revalidate(self, key, url: str, fetch: Callable):
+        with self._lock:
+            if key in self._inflight:
+                return
+            self._inflight.add(key)
+
+        def run():
+            try:
+                self._fetch(key, url, fetch)
+            except Exception as e:
+                logger.warning("Background revalidation failed for %s: %s", url, e)
+                # Remember the failure so the stale copy is reported as such
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        self._entries[key] = CachedResult(entry.value, entry.fetched_at, error=str(e))
+            finally:
+                with self._lock:
+                    self._inflight.discard(key)
+
+        self._executor.submit(run)
+
+    def get(self, key, url: str, fetch: Callable, fresh_for: float = None) -> CachedResult:
+        """
+        Return a CachedResult for key. fetch() is only called inline when
+        nothing usable is cached; otherwise it runs in the background.
+        """
+        fresh_for = self.fresh_for if fresh_for is None else fresh_for
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None and entry.age <= fresh_for:
+            return entry
+
+        if entry is not None and entry.age <= self.stale_for:
+            self._revalidate(key, url, fetch)
+            return CachedResult(entry.value, entry.fetched_at, stale=True, error=entry.error)
+
+        # Nothing cached, or older than stale_for: those are never served,
+        # even during an outage, so a failed fetch raises
+        return self._fetch(key, url, fetch)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+@st.cache_resource
+def get_swr_cache() -> SWRCache:
+    return SWRCache()
+
+
+
+# ---------------------------------------------------------
+# Cached query helpers
+# ---------------------------------------------------------
+def cached_multiple_fields(url: str, fields: list = None) -> CachedResult:
+    from agol_util import get_multiple_fields
+    from agol_query import request_key
+
+    key = request_key(url, {"where": "1=1", "outFields": fields or "*"})
+    return get_swr_cache().get(key, url, lambda: get_multiple_fields(url, fields))
+
+
+def staleness_note(result: CachedResult, what: str) -> Optional[str]:
+    """Human-readable staleness message for the UI, or None when fresh."""
+    if not result.stale:
+        return None
+    minutes = int(result.age // 60)
+    age = "just now" if minutes < 1 else f"{minutes} min ago"
+    reason = " (ArcGIS Online is not responding)" if result.error else ""
+    return f"Showing {what} cached {age}{reason}; refreshing in the background."
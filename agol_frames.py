@@ -0,0 +1,139 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from agol_json import FeatureColumns
+from layer_schema import LayerSchema, get_layer_schema, DATE_TYPES, INTEGER_TYPES, NUMERIC_TYPES
+
+
+# Nullable integer dtype per AGOL integer type
+INTEGER_DTYPES = {
+    "esriFieldTypeSmallInteger": "Int16",
+    "esriFieldTypeInteger": "Int32",
+    "esriFieldTypeBigInteger": "Int64",
+    "esriFieldTypeOID": "Int64",
+}
+
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+
+
+# ---------------------------------------------------------
+# Schema-driven dtypes
+# ---------------------------------------------------------
+def _typed_series(values: list, info, domain_labels: bool) -> pd.Series:
+    # Checked first: integer fields with a coded domain are categorical too
+    if info.domain:
+        return _domain_series(values, info.domain, domain_labels)
+
+    if info.type == "esriFieldTypeDateOnly":
+        # Returned as "YYYY-MM-DD" strings
+        return pd.to_datetime(pd.Series(values, dtype=object), errors="coerce")
+
+    if info.type in DATE_TYPES:
+        # Epoch-ms → datetime64 (UTC); None becomes NaT
+        return pd.to_datetime(pd.Series(values, dtype="Float64"), unit="ms", utc=True)
+
+    if info.type in INTEGER_TYPES:
+        return pd.Series(values, dtype=INTEGER_DTYPES.get(info.type, "Int64"))
+
+    if info.type in NUMERIC_TYPES:
+        return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").astype("float64")
+
+    return _text_series(values)
+
+
+def _domain_series(values: list, domain: dict, domain_labels: bool) -> pd.Series:
+    """
+    Categories are the domain codes (in domain order) so values still
+    round-trip to applyEdits. Stored values outside the domain (legacy
+    codes) are kept as extra categories rather than becoming NaN.
+    domain_labels shows display names instead, made unique by appending
+    the code when two codes share a name.
+    """
+    codes = list(domain)
+    known = set(codes)
+    codes += list(dict.fromkeys(v for v in values if v is not None and v not in known))
+    series = pd.Series(pd.Categorical(values, categories=codes))
+    if not domain_labels:
+        return series
+
+    labels, seen = [], set()
+    for code in codes:
+        label = domain.get(code, code)
+        if label in seen:
+            label = f"{label} ({code})"
+        seen.add(label)
+        labels.append(label)
+    return series.cat.rename_categories(labels)
+
+
+def _text_series(values: list) -> pd.Series:
+    series = pd.Series(values, dtype=object)
+    if len(series) and series.nunique(dropna=True) <= CATEGORY_MAX_RATIO * len(series):
+        return series.astype("category")
+    return series
+
+
+def columns_to_frame(columns: FeatureColumns, schema: Optional[LayerSchema] = None,
+                     domain_labels: bool = False) -> pd.DataFrame:
+    """
+    Build a DataFrame straight from column lists, one typed array per
+    field: datetime64[ns, UTC] for dates, nullable Int16/32/64 for
+    integers, categoricals for coded-value domains and repetitive text.
+    """
+    data = {}
+    for name in columns.fields:
+        info = schema.field(name) if schema is not None else None
+        values = columns[name]
+        data[name] = _typed_series(values, info, domain_labels) if info is not None else _text_series(values)
+    return pd.DataFrame(data, columns=list(columns.fields))
+
+
+def features_to_frame(features: list, fields="*", schema: Optional[LayerSchema] = None,
+                      domain_labels: bool = False) -> pd.DataFrame:
+    return columns_to_frame(FeatureColumns.from_features(features, fields), schema, domain_labels)
+
+
+
+# ---------------------------------------------------------
+# Query modes
+# ---------------------------------------------------------
+def query_frame(url: str, where: str = "1=1", fields="*", schema: Optional[LayerSchema] = None,
+                domain_labels: bool = False) -> pd.DataFrame:
+    """
+    Every matching feature as a typed DataFrame.
+
+    Pages are accumulated as column lists and converted once, so
+    categories and dtypes are consistent across the whole layer.
+    """
+    from agol_util import get_field_columns
+
+    schema = schema or get_layer_schema(url)
+    return columns_to_frame(get_field_columns(url, fields, where), schema, domain_labels)
+
+
+def query_geodataframe(url: str, where: str = "1=1", fields="*", schema: Optional[LayerSchema] = None,
+                       domain_labels: bool = False):
+    """query_frame plus a WGS84 geometry column (GeoDataFrame)."""
+    import geopandas as gpd
+    from shapely.geometry import shape
+
+    from agol_util import get_field_columns
+    from esri_geojson import esri_to_geojson
+
+    schema = schema or get_layer_schema(url)
+    columns = get_field_columns(url, fields, where, return_geometry=True)
+
+    geometry = np.array([
+        shape(g) if g else None
+        for g in (esri_to_geojson(e) for e in (columns.geometries or []))
+    ], dtype=object)
+
+    return gpd.GeoDataFrame(
+        columns_to_frame(columns, schema, domain_labels),
+        geometry=geometry,
+        crs="EPSG:4326"
+    )
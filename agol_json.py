@@ -0,0 +1,111 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib parser
+    orjson = None
+
+
+
+# ---------------------------------------------------------
+# Decoding
+# ---------------------------------------------------------
+def loads(content):
+    """Parse a JSON body (bytes or str) with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def decode_response(response) -> dict:
+    """Decode a requests/httpx response body without going through .json()."""
+    return loads(response.content)
+
+
+def parse_fields(fields) -> tuple:
+    """
+    Normalise an outFields argument to a tuple of names.
+    Returns None for "*" (every field).
+    """
+    if fields is None or fields == "*":
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    names = tuple(f.strip() for f in fields if f and f.strip())
+    return None if "*" in names else names
+
+
+
+# ---------------------------------------------------------
+# Projection
+# ---------------------------------------------------------
+def project_features(features: list, fields: tuple = None, return_geometry: bool = False) -> list:
+    """
+    Restrict features to the requested fields.
+
+    AGOL normally returns exactly the outFields asked for, so when the
+    first feature already has that key set the decoded features are
+    returned as-is and nothing is copied.
+    """
+    if not features:
+        return []
+
+    first = features[0]
+    same_fields = fields is None or set(first.get("attributes") or ()) == set(fields)
+    same_geometry = return_geometry or "geometry" not in first
+    if same_fields and same_geometry:
+        return features
+
+    projected = []
+    for feature in features:
+        attributes = feature.get("attributes") or {}
+        package = {"attributes": attributes if fields is None else {f: attributes.get(f) for f in fields}}
+        if return_geometry:
+            package["geometry"] = feature.get("geometry", {})
+        projected.append(package)
+    return projected
+
+
+class FeatureColumns:
+    """
+    Column-oriented view of a feature array: one list per field instead
+    of one dict per feature.
+
+        cols = FeatureColumns.from_features(data["features"], ["Proj_Name", "globalid"])
+        cols["Proj_Name"]   → list of names
+    """
+
+    __slots__ = ("fields", "columns", "geometries")
+
+    def __init__(self, fields: tuple, columns: dict, geometries: list = None):
+        self.fields = fields
+        self.columns = columns
+        self.geometries = geometries
+
+    @classmethod
+    def from_features(cls, features: list, fields=None, return_geometry: bool = False) -> "FeatureColumns":
+        attributes = [feature.get("attributes") or {} for feature in features]
+        names = parse_fields(fields)
+        if names is None:
+            names = tuple(attributes[0]) if attributes else ()
+
+        columns = {name: [a.get(name) for a in attributes] for name in names}
+        geometries = [feature.get("geometry") for feature in features] if return_geometry else None
+        return cls(names, columns, geometries)
+
+    def extend(self, other: "FeatureColumns"):
+        for name in self.fields:
+            self.columns[name].extend(other.columns.get(name) or [None] * len(other))
+        if self.geometries is not None:
+            self.geometries.extend(other.geometries or [None] * len(other))
+
+    def __len__(self):
+        return len(self.columns[self.fields[0]]) if self.fields else 0
+
+    def __getitem__(self, name: str) -> list:
+        return self.columns[name]
+
+    def rows(self):
+        """Yield one attribute dict per feature (built lazily)."""
+        for values in zip(*(self.columns[name] for name in self.fields)):
+            yield dict(zip(self.fields, values))
@@ -0,0 +1,146 @@
+import math
+import re
+import uuid
+from datetime import date, datetime, timezone
+from urllib.parse import urlsplit, urlunsplit
+
+
+# Field names AGOL accepts in a where clause
+FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Fields holding GUIDs; their values are normalized before quoting
+GUID_FIELDS = {"globalid", "parentglobalid", "guid"}
+
+# Request parameters that never change the result
+VOLATILE_PARAMS = {"token", "f"}
+
+
+
+# ---------------------------------------------------------
+# Values
+# ---------------------------------------------------------
+def normalize_guid(value) -> str:
+    """
+    Canonical GUID form: upper case, with braces.
+    Raises ValueError for anything that is not a GUID.
+    """
+    if isinstance(value, uuid.UUID):
+        return f"{{{str(value).upper()}}}"
+    if not isinstance(value, str):
+        raise ValueError(f"Not a GUID: {value!r}")
+    try:
+        return f"{{{str(uuid.UUID(value.strip())).upper()}}}"
+    except ValueError:
+        raise ValueError(f"Not a GUID: {value!r}")
+
+
+def field(name: str) -> str:
+    """Validate a field name before it is placed in a where clause."""
+    if not isinstance(name, str) or not FIELD_NAME.match(name):
+        raise ValueError(f"Invalid field name: {name!r}")
+    return name
+
+
+def quote(value) -> str:
+    """SQL-92 literal for a value (strings escaped, dates as timestamps)."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"Cannot compare against {value!r}")
+        return repr(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return f"timestamp '{value:%Y-%m-%d %H:%M:%S}'"
+    if isinstance(value, date):
+        return f"date '{value:%Y-%m-%d}'"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _value(name: str, value):
+    return normalize_guid(value) if name.lower() in GUID_FIELDS else value
+
+
+
+# ---------------------------------------------------------
+# Clauses
+# ---------------------------------------------------------
+def eq(name: str, value) -> str:
+    """`name = value`; GUID fields are normalized first."""
+    name = field(name)
+    if value is None:
+        return f"{name} IS NULL"
+    return f"{name} = {quote(_value(name, value))}"
+
+
+def compare(name: str, operator: str, value) -> str:
+    if operator not in ("=", "<>", "<", "<=", ">", ">="):
+        raise ValueError(f"Unsupported operator: {operator!r}")
+    return f"{field(name)} {operator} {quote(_value(name, value))}"
+
+
+def in_list(name: str, values) -> str:
+    """`name IN (...)` over the distinct values, in a stable order."""
+    name = field(name)
+    canonical = sorted({_value(name, v) for v in values if v is not None}, key=lambda v: (str(type(v)), v))
+    if not canonical:
+        return "1=0"
+    return f"{name} IN ({','.join(quote(v) for v in canonical)})"
+
+
+def in_chunks(name: str, values, size: int) -> list:
+    """in_list clauses of at most `size` values each."""
+    name = field(name)
+    canonical = sorted({_value(name, v) for v in values if v is not None}, key=lambda v: (str(type(v)), v))
+    return [in_list(name, canonical[i:i + size]) for i in range(0, len(canonical), size)]
+
+
+def and_(*clauses) -> str:
+    clauses = [c for c in clauses if c and c != "1=1"]
+    if not clauses:
+        return "1=1"
+    return " AND ".join(f"({c})" if len(clauses) > 1 else c for c in clauses)
+
+
+
+# ---------------------------------------------------------
+# Canonical request keys
+# ---------------------------------------------------------
+def canonical_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), "", ""))
+
+
+def canonical_fields(fields) -> str:
+    if fields is None or fields == "*":
+        return "*"
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    names = sorted({f.strip().lower() for f in fields if f and f.strip()})
+    return "*" if "*" in names else ",".join(names)
+
+
+def request_key(url: str, params: dict = None) -> tuple:
+    """
+    Hashable key identifying a request by what it returns: the URL is
+    normalized, tokens dropped, outFields sorted and parameter order
+    ignored. Identical queries from anywhere in the app share a key,
+    so caches, batching and in-flight dedup can rely on it.
+    """
+    items = []
+    for name, value in (params or {}).items():
+        if name in VOLATILE_PARAMS or value is None:
+            continue
+        if name == "outFields":
+            value = canonical_fields(value)
+        elif name == "where":
+            value = " ".join(str(value).split())
+        elif isinstance(value, (list, tuple)):
+            value = ",".join(map(str, value))
+        items.append((name, str(value).lower() if isinstance(value, bool) else str(value)))
+    return (canonical_url(url), tuple(sorted(items)))
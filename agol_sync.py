@@ -0,0 +1,366 @@
+"""
+Local SQLite mirror of the APEX layers, kept current incrementally.
+
+After an initial paged snapshot each layer is brought up to date with the
+FeatureServer's extractChanges endpoint (server generations). Layers on
+services without change tracking fall back to an EditDate watermark plus
+an OBJECTID diff for deletes.
+
+Run headless:  python agol_sync.py [layer_key ...]
+"""
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import streamlit as st
+
+from init_session import APEX_URLS, APEX_LAYERS
+from agol_query import compare
+from agol_util import (
+    get_layer_metadata,
+    query_features,
+    extract_changes,
+    get_object_ids,
+    format_guid
+)
+
+
+logger = logging.getLogger("agol_sync")
+
+MIRROR_PATH = os.path.join(".cache", "apex_mirror.sqlite")
+
+# Seconds between background sync passes
+SYNC_INTERVAL = 5 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    layer       TEXT    NOT NULL,
+    objectid    INTEGER NOT NULL,
+    globalid    TEXT,
+    edit_date   INTEGER,
+    attributes  TEXT    NOT NULL,
+    geometry    TEXT,
+    PRIMARY KEY (layer, objectid)
+);
+CREATE INDEX IF NOT EXISTS features_globalid ON features (layer, globalid);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    layer           TEXT PRIMARY KEY,
+    url             TEXT NOT NULL,
+    mode            TEXT NOT NULL,
+    server_gen      INTEGER,
+    edit_watermark  INTEGER,
+    synced_at       REAL
+);
+"""
+
+
+
+# ---------------------------------------------------------
+# SQLite mirror
+# ---------------------------------------------------------
+class LocalMirror:
+    """Thread-safe SQLite store of layer features keyed by (layer, OBJECTID)."""
+
+    def __init__(self, path: str = MIRROR_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ---------------------------------------------------------
+    # Writes
+    # ---------------------------------------------------------
+    def upsert(self, layer: str, features: list, oid_field: str, gid_field: str = None,
+               edit_field: str = None, conn=None):
+        rows = []
+        for feature in features:
+            attributes = feature.get("attributes", {})
+            geometry = feature.get("geometry")
+            rows.append((
+                layer,
+                attributes.get(oid_field),
+                format_guid(attributes.get(gid_field)) if gid_field else None,
+                attributes.get(edit_field) if edit_field else None,
+                json.dumps(attributes, separators=(",", ":")),
+                json.dumps(geometry, separators=(",", ":")) if geometry else None
+            ))
+
+        sql = "INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?, ?)"
+        if conn is not None:
+            conn.executemany(sql, rows)
+        else:
+            with self._connect() as conn:
+                conn.executemany(sql, rows)
+        return len(rows)
+
+    def delete(self, layer: str, objectids, conn=None) -> int:
+        rows = [(layer, oid) for oid in objectids]
+        sql = "DELETE FROM features WHERE layer = ? AND objectid = ?"
+        if conn is not None:
+            conn.executemany(sql, rows)
+        else:
+            with self._connect() as conn:
+                conn.executemany(sql, rows)
+        return len(rows)
+
+    def set_state(self, layer: str, url: str, mode: str, server_gen=None, edit_watermark=None, conn=None):
+        sql = "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?, ?)"
+        values = (layer, url, mode, server_gen, edit_watermark, time.time())
+        if conn is not None:
+            conn.execute(sql, values)
+        else:
+            with self._connect() as conn:
+                conn.execute(sql, values)
+
+    # ---------------------------------------------------------
+    # Reads
+    # ---------------------------------------------------------
+    def get_state(self, layer: str):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM sync_state WHERE layer = ?", (layer,)).fetchone()
+        return dict(row) if row else None
+
+    def is_synced(self, layer: str, max_age: float = None) -> bool:
+        state = self.get_state(layer)
+        if not state:
+            return False
+        return max_age is None or time.time() - state["synced_at"] <= max_age
+
+    def object_ids(self, layer: str) -> set:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT objectid FROM features WHERE layer = ?", (layer,))
+            return {r[0] for r in rows}
+
+    def max_edit_date(self, layer: str):
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(edit_date) FROM features WHERE layer = ?", (layer,)).fetchone()
+        return row[0] if row else None
+
+    def select_record(self, layer: str, globalid: str) -> list:
+        """Same shape as agol_util.select_record: a list of features."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT attributes, geometry FROM features WHERE layer = ? AND globalid = ?",
+                (layer, format_guid(globalid))
+            ).fetchall()
+
+        return [
+            {"attributes": json.loads(r["attributes"]),
+             "geometry": json.loads(r["geometry"]) if r["geometry"] else None}
+            for r in rows
+        ]
+
+    def all_attributes(self, layer: str, fields: list = None) -> list:
+        """Same shape as agol_util.get_multiple_fields: a list of attribute dicts."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT attributes FROM features WHERE layer = ?", (layer,))
+            records = [json.loads(r[0]) for r in rows]
+
+        if fields:
+            return [{f: record.get(f) for f in fields} for record in records]
+        return records
+
+
+
+# ---------------------------------------------------------
+# Sync engine
+# ---------------------------------------------------------
+def _split_layer_url(url: str):
+    service_url, _, layer_id = url.rstrip("/").rpartition("/")
+    return service_url, int(layer_id)
+
+
+def _utc(epoch_ms: int) -> datetime:
+    return datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc)
+
+
+class SyncEngine:
+    """Keeps LocalMirror current for a set of layers."""
+
+    def __init__(self, mirror: LocalMirror = None, layers: dict = None):
+        self.mirror = mirror or LocalMirror()
+        self.layers = layers or {key: APEX_URLS[key] for key in APEX_LAYERS}
+        self._metadata = {}
+        self._service_gens = {}
+
+    # ---------------------------------------------------------
+    # Metadata helpers
+    # ---------------------------------------------------------
+    def _layer_info(self, url: str) -> dict:
+        if url not in self._metadata:
+            metadata = get_layer_metadata(url)
+            edit_info = metadata.get("editFieldsInfo") or {}
+            self._metadata[url] = {
+                "oid": metadata.get("objectIdField") or "OBJECTID",
+                "gid": metadata.get("globalIdField"),
+                "edit": edit_info.get("editDateField"),
+            }
+        return self._metadata[url]
+
+    def _server_gen(self, url: str):
+        """Current serverGen for the layer, or None without change tracking."""
+        service_url, layer_id = _split_layer_url(url)
+        if service_url not in self._service_gens:
+            try:
+                info = get_layer_metadata(service_url)
+            except Exception as e:
+                logger.warning("Service info unavailable for %s: %s", service_url, e)
+                info = {}
+
+            tracking = info.get("changeTrackingInfo") or {}
+            self._service_gens[service_url] = {
+                g.get("id"): g.get("serverGen") for g in tracking.get("layerServerGens", [])
+            }
+        return self._service_gens[service_url].get(layer_id)
+
+    # ---------------------------------------------------------
+    # Sync strategies
+    # ---------------------------------------------------------
+    def _snapshot(self, layer: str, url: str, info: dict) -> dict:
+        # Read the generation first so edits made during the snapshot are
+        # picked up again by the next incremental pass
+        server_gen = self._server_gen(url)
+        count = 0
+
+        with self.mirror._connect() as conn:
+            conn.execute("DELETE FROM features WHERE layer = ?", (layer,))
+            for page in query_features(url, fields="*", return_geometry=True):
+                count += self.mirror.upsert(layer, page, info["oid"], info["gid"], info["edit"], conn=conn)
+
+            watermark = conn.execute(
+                "SELECT MAX(edit_date) FROM features WHERE layer = ?", (layer,)
+            ).fetchone()[0]
+            mode = "server_gen" if server_gen is not None else "edit_date"
+            self.mirror.set_state(layer, url, mode, server_gen, watermark, conn=conn)
+
+        return {"layer": layer, "mode": "snapshot", "upserts": count, "deletes": 0}
+
+    def _sync_server_gen(self, layer: str, url: str, info: dict, state: dict) -> dict:
+        service_url, layer_id = _split_layer_url(url)
+        changes = extract_changes(service_url, layer_id, state["server_gen"])
+
+        with self.mirror._connect() as conn:
+            upserts = self.mirror.upsert(
+                layer, changes["adds"] + changes["updates"], info["oid"], info["gid"], info["edit"], conn=conn
+            )
+            deletes = self.mirror.delete(layer, changes["delete_ids"], conn=conn)
+            self.mirror.set_state(
+                layer, url, "server_gen", changes["server_gen"], state.get("edit_watermark"), conn=conn
+            )
+
+        return {"layer": layer, "mode": "server_gen", "upserts": upserts, "deletes": deletes}
+
+    def _sync_edit_date(self, layer: str, url: str, info: dict, state: dict) -> dict:
+        if not info["edit"]:
+            # Nothing to watermark on → fall back to a fresh snapshot
+            return self._snapshot(layer, url, info)
+
+        watermark = state.get("edit_watermark")
+        where = compare(info["edit"], ">", _utc(watermark)) if watermark else "1=1"
+
+        with self.mirror._connect() as conn:
+            upserts = 0
+            for page in query_features(url, where=where, fields="*", return_geometry=True):
+                upserts += self.mirror.upsert(layer, page, info["oid"], info["gid"], info["edit"], conn=conn)
+
+            # Deletes don't touch EditDate; diff the OBJECTID sets instead
+            remote_ids = set(get_object_ids(url))
+            local_ids = {r[0] for r in conn.execute("SELECT objectid FROM features WHERE layer = ?", (layer,))}
+            deletes = self.mirror.delete(layer, local_ids - remote_ids, conn=conn)
+
+            new_watermark = conn.execute(
+                "SELECT MAX(edit_date) FROM features WHERE layer = ?", (layer,)
+            ).fetchone()[0]
+            self.mirror.set_state(layer, url, "edit_date", None, new_watermark, conn=conn)
+
+        return {"layer": layer, "mode": "edit_date", "upserts": upserts, "deletes": deletes}
+
+    # ---------------------------------------------------------
+    # Public API
+    # ---------------------------------------------------------
+    def sync_layer(self, layer: str) -> dict:
+        url = self.layers[layer]
+        info = self._layer_info(url)
+        state = self.mirror.get_state(layer)
+
+        if not state or state["url"] != url:
+            return self._snapshot(layer, url, info)
+
+        if state["mode"] == "server_gen" and state["server_gen"] is not None:
+            try:
+                return self._sync_server_gen(layer, url, info, state)
+            except Exception as e:
+                # Generation too old or tracking disabled → start over
+                logger.warning("extractChanges failed for %s, re-snapshotting: %s", layer, e)
+                return self._snapshot(layer, url, info)
+
+        return self._sync_edit_date(layer, url, info, state)
+
+    def sync_all(self, layers: list = None) -> list:
+        self._service_gens = {}
+        results = []
+        for layer in layers or list(self.layers):
+            started = time.perf_counter()
+            try:
+                result = self.sync_layer(layer)
+            except Exception as e:
+                logger.error("Sync failed for %s: %s", layer, e)
+                result = {"layer": layer, "mode": "error", "error": str(e)}
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            results.append(result)
+        return results
+
+
+
+# ---------------------------------------------------------
+# Background sync (one thread per process)
+# ---------------------------------------------------------
+def start_background_sync(interval: float = SYNC_INTERVAL) -> threading.Thread:
+    engine = SyncEngine()
+
+    def run():
+        while True:
+            for result in engine.sync_all():
+                logger.info("Mirror sync: %s", result)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="agol-mirror-sync", daemon=True)
+    thread.start()
+    return thread
+
+
+
+@st.cache_resource
+def get_local_mirror() -> LocalMirror:
+    """Process-wide mirror; the first caller starts the background sync."""
+    mirror = LocalMirror()
+    start_background_sync()
+    return mirror
+
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for summary in SyncEngine().sync_all(sys.argv[1:] or None):
+        print(json.dumps(summary))
@@ -2,11 +2,76 @@ import json
 import requests
 import streamlit as st
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from init_session import APEX_LAYERS, APEX_URLS, load_credentials
+from record_store import PROJECT_PREFIXES, ProjectRecord, get_record_store
+from agol_cache import ServerError, get_swr_cache
+from agol_async import query_many
+from agol_json import FeatureColumns, decode_response, parse_fields, project_features
+from agol_query import GUID_FIELDS, eq, in_chunks, normalize_guid, request_key
 
 
-# Pull Username and Password
-agol_username = st.session_state['AGOL_USERNAME']
-agol_password = st.session_state['AGOL_PASSWORD']
+# Ids per `IN (...)` clause in batch selects (where clauses are POSTed)
+IN_LIST_SIZE = 250
+
+
+
+# ---------------------------------------------------------
+# Single-flight request coalescing
+# ---------------------------------------------------------
+class SingleFlight:
+    """
+    Concurrent calls with the same key (from any session or thread) wait
+    for the first caller's request and share its result or exception.
+    Results are shared objects; callers must treat them as read-only.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.upstream = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+                self.upstream += 1
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["done"].set()
+
+    def stats(self) -> dict:
+        """requests made, upstream calls issued, and requests per upstream call."""
+        with self._lock:
+            requests, upstream = self.requests, self.upstream
+        return {
+            "requests": requests,
+            "upstream": upstream,
+            "coalesced": requests - upstream,
+            "ratio": round(requests / upstream, 2) if upstream else None,
+        }
+
+
+single_flight = SingleFlight()
 
 
 
@@ -19,16 +84,15 @@ def format_guid(value) -> str:
     if not value or not isinstance(value, str):
         return None
 
-    clean_value = value.strip().lstrip("{").rstrip("}")
-    parts = clean_value.split("-")
-    if len(parts) != 5 or not all(parts):
+    try:
+        return normalize_guid(value)
+    except ValueError:
         return None
 
-    return f"{{{clean_value}}}"
-
 
 def get_agol_token() -> str:
     url = "https://www.arcgis.com/sharing/rest/generateToken"
+    agol_username, agol_password = load_credentials()
 
     data = {
         "username": agol_username,
@@ -43,7 +107,7 @@ def get_agol_token() -> str:
         if response.status_code != 200:
             raise Exception(f"Request failed with status code {response.status_code}: {response.text}")
 
-        token_data = response.json()
+        token_data = decode_response(response)
 
         if "token" in token_data:
             return token_data["token"]
@@ -56,47 +120,90 @@ def get_agol_token() -> str:
         raise ConnectionError(f"Failed to connect to ArcGIS Online: {e}")
 
 
-def get_unique_field_values(
-    url: str,
-    field: str,
-    where: str = "1=1",
-    sort_type: str = None,
-    sort_order: str = "asc"
-) -> list:
-
+def get_layer_metadata(url: str) -> dict:
+    """Return the layer's service metadata (fields, domains, geometry type, ...)."""
     try:
         token = get_agol_token()
         if not token:
             raise ValueError("Authentication failed: Invalid token.")
 
         params = {
-            "where": where,
-            "outFields": field,
-            "returnDistinctValues": "true",
-            "returnGeometry": "false",
             "f": "json",
             "token": token
         }
 
-        query_url = f"{url}/query"
-        response = requests.get(query_url, params=params)
+        response = requests.get(url, params=params)
 
         if response.status_code != 200:
             raise Exception(f"Request failed with status code {response.status_code}: {response.text}")
 
-        data = response.json()
+        data = decode_response(response)
         if "error" in data:
             raise Exception(f"API Error: {data['error']['message']} - {data['error'].get('details', [])}")
 
-        available_fields = {field_info["name"] for field_info in data.get("fields", [])}
-        if field not in available_fields:
-            raise ValueError(f"Field '{field}' does not exist. Available fields: {available_fields}")
+        return data
 
-        unique_values = []
-        for feature in data.get("features", []):
-            attributes = feature.get("attributes", {})
-            if field in attributes and attributes[field] not in unique_values:
-                unique_values.append(attributes[field])
+    except Exception as e:
+        raise Exception(f"Error retrieving layer metadata: {e}")
+
+
+def get_unique_field_values(
+    url: str,
+    field: str,
+    where: str = "1=1",
+    sort_type: str = None,
+    sort_order: str = "asc"
+) -> list:
+
+    try:
+        token = get_agol_token()
+        if not token:
+            raise ValueError("Authentication failed: Invalid token.")
+
+        query_url = f"{url}/query"
+        page_size = 2000
+        offset = 0
+
+        # Set-based de-duplication keeps first-seen order without O(n²) scans
+        unique_values = {}
+        while True:
+            params = {
+                "where": where,
+                "outFields": field,
+                "returnDistinctValues": "true",
+                "returnGeometry": "false",
+                "orderByFields": field,
+                "resultOffset": offset,
+                "resultRecordCount": page_size,
+                "f": "json",
+                "token": token
+            }
+
+            response = requests.get(query_url, params=params)
+
+            if response.status_code != 200:
+                raise Exception(f"Request failed with status code {response.status_code}: {response.text}")
+
+            data = decode_response(response)
+            if "error" in data:
+                raise Exception(f"API Error: {data['error']['message']} - {data['error'].get('details', [])}")
+
+            if offset == 0:
+                available_fields = {field_info["name"] for field_info in data.get("fields", [])}
+                if field not in available_fields:
+                    raise ValueError(f"Field '{field}' does not exist. Available fields: {available_fields}")
+
+            features = data.get("features", [])
+            for feature in features:
+                attributes = feature.get("attributes", {})
+                if field in attributes:
+                    unique_values.setdefault(attributes[field], None)
+
+            if not features or not data.get("exceededTransferLimit"):
+                break
+            offset += len(features)
+
+        unique_values = list(unique_values)
 
         if sort_type:
             reverse = sort_order.lower() == "desc"
@@ -121,19 +228,65 @@ def get_unique_field_values(
 
 def get_multiple_fields(url: str, fields: list = None) -> list:
     try:
-        token = get_agol_token()
-        if not token:
-            raise ValueError("Authentication failed: Invalid token.")
-
         out_fields = ",".join(fields) if fields else "*"
 
         params = {
             "where": "1=1",
             "outFields": out_fields,
             "returnGeometry": "false",
+            "f": "json"
+        }
+
+        query_url = f"{url}/query"
+
+        def fetch():
+            token = get_agol_token()
+            if not token:
+                raise ValueError("Authentication failed: Invalid token.")
+
+            response = requests.get(query_url, params={**params, "token": token})
+
+            if response.status_code >= 500:
+                raise ServerError(response.status_code, response.text)
+            if response.status_code != 200:
+                raise Exception(f"Request failed with status code {response.status_code}: {response.text}")
+
+            data = decode_response(response)
+            if "error" in data:
+                raise Exception(f"API Error: {data['error']['message']} - {data['error'].get('details', [])}")
+
+            # The decoded attribute dicts are already fresh objects; no copy needed
+            return [feature.get("attributes", {}) for feature in data.get("features", [])]
+
+        # Concurrent identical requests share one HTTP call
+        return single_flight.do(request_key(query_url, params), fetch)
+
+    except Exception as e:
+        raise Exception(f"Error retrieving project records: {e}")
+
+
+def get_field_statistics(url: str, statistics: list, group_by: list = None, where: str = "1=1") -> list:
+    """
+    Server-side aggregates via outStatistics / groupByFieldsForStatistics.
+
+    statistics: [{"statisticType": "sum", "onStatisticField": "awarded_amount",
+                  "outStatisticFieldName": "awarded_amount"}, ...]
+    Returns one attribute dict per group.
+    """
+    try:
+        token = get_agol_token()
+        if not token:
+            raise ValueError("Authentication failed: Invalid token.")
+
+        params = {
+            "where": where,
+            "outStatistics": json.dumps(statistics),
+            "returnGeometry": "false",
             "f": "json",
             "token": token
         }
+        if group_by:
+            params["groupByFieldsForStatistics"] = ",".join(group_by)
 
         query_url = f"{url}/query"
         response = requests.get(query_url, params=params)
@@ -141,47 +294,191 @@ def get_multiple_fields(url: str, fields: list = None) -> list:
         if response.status_code != 200:
             raise Exception(f"Request failed with status code {response.status_code}: {response.text}")
 
-        data = response.json()
+        data = decode_response(response)
         if "error" in data:
             raise Exception(f"API Error: {data['error']['message']} - {data['error'].get('details', [])}")
 
-        results = []
-        for feature in data.get("features", []):
-            attributes = feature.get("attributes", {})
-            results.append({k: v for k, v in attributes.items()})
+        return [feature.get("attributes", {}) for feature in data.get("features", [])]
 
-        return results
+    except Exception as e:
+        raise Exception(f"Error retrieving statistics: {e}")
+
+
+def query_features(url: str, where: str = "1=1", fields="*", return_geometry=False,
+                   page_size: int = 2000, extra_params: dict = None):
+    """
+    Generator over a layer query, one page of features at a time.
+
+    Pages with resultOffset/resultRecordCount ordered by OBJECTID so only a
+    single page is held in memory.
+    """
+    token = get_agol_token()
+    if not token:
+        raise ValueError("Authentication failed: Invalid token.")
+
+    out_fields = ",".join(fields) if isinstance(fields, (list, tuple)) else fields
+    query_url = f"{url}/query"
+    offset = 0
+
+    while True:
+        params = {
+            "where": where,
+            "outFields": out_fields,
+            "returnGeometry": str(return_geometry).lower(),
+            "outSR": 4326,
+            "orderByFields": "OBJECTID",
+            "resultOffset": offset,
+            "resultRecordCount": page_size,
+            "f": "json",
+            "token": token
+        }
+        if extra_params:
+            params.update(extra_params)
+
+        response = requests.post(query_url, data=params)
+
+        if response.status_code != 200:
+            raise Exception(f"Request failed with status code {response.status_code}: {response.text}")
+
+        data = decode_response(response)
+        if "error" in data:
+            raise Exception(f"API Error: {data['error']['message']} - {data['error'].get('details', [])}")
+
+        features = data.get("features", [])
+        if features:
+            yield features
+
+        if not features or not data.get("exceededTransferLimit"):
+            break
+        offset += len(features)
+
+
+def get_field_columns(url: str, fields: list, where: str = "1=1", return_geometry=False) -> FeatureColumns:
+    """Every matching feature as one list per field (see agol_json.FeatureColumns)."""
+    columns = None
+    for page in query_features(url, where=where, fields=fields, return_geometry=return_geometry):
+        chunk = FeatureColumns.from_features(page, fields, return_geometry)
+        if columns is None:
+            columns = chunk
+        else:
+            columns.extend(chunk)
+    return columns or FeatureColumns.from_features([], fields, return_geometry)
+
+
+def get_object_ids(url: str, where: str = "1=1") -> list:
+    """All OBJECTIDs matching a where clause (not subject to maxRecordCount)."""
+    try:
+        token = get_agol_token()
+        if not token:
+            raise ValueError("Authentication failed: Invalid token.")
+
+        params = {
+            "where": where,
+            "returnIdsOnly": "true",
+            "f": "json",
+            "token": token
+        }
+
+        response = requests.post(f"{url}/query", data=params)
+
+        if response.status_code != 200:
+            raise Exception(f"Request failed with status code {response.status_code}: {response.text}")
+
+        data = decode_response(response)
+        if "error" in data:
+            raise Exception(f"API Error: {data['error']['message']} - {data['error'].get('details', [])}")
+
+        return data.get("objectIds") or []
 
     except Exception as e:
-        raise Exception(f"Error retrieving project records: {e}")
+        raise Exception(f"Error retrieving object ids: {e}")
 
 
-def select_record(url: str, id_field: str, id_value: str, fields="*", return_geometry=False):
+def extract_changes(service_url: str, layer_id: int, server_gen: int, return_geometry=True) -> dict:
+    """
+    Inserts/updates/deletes on one layer since server_gen, using the
+    FeatureServer change-tracking endpoint.
+
+    Returns {"server_gen": int, "adds": [...], "updates": [...], "delete_ids": [...]}.
+    """
     try:
         token = get_agol_token()
         if not token:
             raise ValueError("Authentication failed: Invalid token.")
 
         params = {
-            "where": f"{id_field}='{id_value}'",
-            "outFields": fields,
+            "layers": json.dumps([layer_id]),
+            "layerServerGens": json.dumps([{"id": layer_id, "serverGen": server_gen}]),
+            "returnInserts": "true",
+            "returnUpdates": "true",
+            "returnDeletes": "true",
+            "returnIdsOnly": "false",
             "returnGeometry": str(return_geometry).lower(),
             "outSR": 4326,
+            "dataFormat": "json",
             "f": "json",
             "token": token
         }
 
-        query_url = f"{url}/query"
-        response = requests.get(query_url, params=params)
+        response = requests.post(f"{service_url}/extractChanges", data=params)
 
         if response.status_code != 200:
             raise Exception(f"Request failed with status code {response.status_code}: {response.text}")
 
-        data = response.json()
+        data = decode_response(response)
         if "error" in data:
             raise Exception(f"API Error: {data['error']['message']} - {data['error'].get('details', [])}")
 
-        return data.get("features", [])
+        new_gen = next(
+            (g.get("serverGen") for g in data.get("layerServerGens", []) if g.get("id") == layer_id),
+            server_gen
+        )
+        changes = next((e for e in data.get("edits", []) if e.get("id") == layer_id), {})
+        features = changes.get("features", {})
+
+        return {
+            "server_gen": new_gen,
+            "adds": features.get("adds", []),
+            "updates": features.get("updates", []),
+            "delete_ids": features.get("deleteIds", [])
+        }
+
+    except Exception as e:
+        raise Exception(f"Error extracting changes: {e}")
+
+
+def select_record(url: str, id_field: str, id_value: str, fields="*", return_geometry=False):
+    try:
+        params = {
+            "where": eq(id_field, id_value),
+            "outFields": fields,
+            "returnGeometry": str(return_geometry).lower(),
+            "outSR": 4326,
+            "f": "json"
+        }
+
+        query_url = f"{url}/query"
+
+        def fetch():
+            token = get_agol_token()
+            if not token:
+                raise ValueError("Authentication failed: Invalid token.")
+
+            response = requests.get(query_url, params={**params, "token": token})
+
+            if response.status_code >= 500:
+                raise ServerError(response.status_code, response.text)
+            if response.status_code != 200:
+                raise Exception(f"Request failed with status code {response.status_code}: {response.text}")
+
+            data = decode_response(response)
+            if "error" in data:
+                raise Exception(f"API Error: {data['error']['message']} - {data['error'].get('details', [])}")
+
+            return data.get("features", [])
+
+        # Concurrent identical requests share one HTTP call
+        return single_flight.do(request_key(query_url, params), fetch)
 
     except Exception as e:
         raise Exception(f"Error retrieving project record: {e}")
@@ -194,7 +491,7 @@ def delete_project(url: str, globalid: str) -> bool:
             raise ValueError("Authentication failed: Invalid token.")
 
         params = {
-            "where": f"GlobalID='{globalid}'",
+            "where": eq("GlobalID", globalid),
             "f": "json",
             "token": token
         }
@@ -202,7 +499,7 @@ def delete_project(url: str, globalid: str) -> bool:
         delete_url = f"{url}/deleteFeatures"
 
         response = requests.post(delete_url, data=params)
-        result = response.json()
+        result = decode_response(response)
 
         if "deleteResults" in result:
             success = all(r.get("success", False) for r in result["deleteResults"])
@@ -216,6 +513,111 @@ def delete_project(url: str, globalid: str) -> bool:
         return False
 
 
+def select_records(url: str, id_field: str, id_values: list, fields="*", return_geometry=False,
+                   chunk_size: int = IN_LIST_SIZE) -> dict:
+    """
+    Many records in a handful of requests: one paged, POSTed
+    `id_field IN (...)` query per chunk of ids instead of one
+    select_record call per id, with the chunks run concurrently.
+
+    Returns {id_value: feature} for the ids that were found.
+    """
+    is_guid = id_field.lower() == "globalid"
+
+    def normalize(value):
+        return format_guid(value) if is_guid else str(value)
+
+    wanted = {normalize(v): v for v in id_values if v}
+    if fields != "*":
+        names = fields.split(",") if isinstance(fields, str) else list(fields)
+        if id_field.lower() not in {n.strip().lower() for n in names}:
+            names.append(id_field)
+        fields = names
+
+    found = {}
+    try:
+        # The chunks are fetched concurrently over the shared async client
+        wheres = in_chunks(id_field, [v for v in id_values if v], chunk_size)
+        for features in query_many(url, wheres, fields=fields, return_geometry=return_geometry):
+            for feature in features:
+                attributes = {k.lower(): v for k, v in feature.get("attributes", {}).items()}
+                key = normalize(attributes.get(id_field.lower()))
+                if key in wanted:
+                    found[wanted[key]] = feature
+    except Exception as e:
+        raise Exception(f"Error retrieving project records: {e}")
+
+    return found
+
+
+def get_records(url: str, guids: list, max_age: float = None, fields="*") -> dict:
+    """
+    ProjectRecords for many GUIDs: served from the shared RecordStore
+    when fresh enough, the rest fetched together with select_records().
+    Returns {guid: ProjectRecord}.
+    """
+    store = get_record_store()
+    records = {}
+    missing = []
+    for guid in dict.fromkeys(guids):
+        record = store.get(url, guid, max_age, fields=fields)
+        if record is None:
+            missing.append(guid)
+        else:
+            records[guid] = record
+
+    if missing:
+        for guid, feature in select_records(url, "globalid", missing, fields=fields).items():
+            records[guid] = store.put(ProjectRecord.from_feature(url, guid, feature, fields))
+
+    return {guid: records[guid] for guid in guids if guid in records}
+
+
+def local_mirror_for(url: str, enabled: bool):
+    """
+    (LocalMirror, layer key) when the mirror is enabled and has synced the
+    layer at `url` recently, otherwise (None, None). `enabled` is passed in
+    (usually st.session_state["use_local_mirror"]) so worker threads can
+    call this too.
+    """
+    layer = next((key for key in APEX_LAYERS if APEX_URLS[key] == url), None)
+    if not enabled or layer is None:
+        return None, None
+
+    # Imported here: agol_sync imports this module
+    from agol_sync import SYNC_INTERVAL, get_local_mirror
+
+    mirror = get_local_mirror()
+    if not mirror.is_synced(layer, max_age=2 * SYNC_INTERVAL):
+        return None, None
+    return mirror, layer
+
+
+def refresh_record_fields(url: str, guid: str, fields: list):
+    """
+    Re-read only `fields` of a stored record and merge them into the
+    shared RecordStore, so a single saved card can redraw without a full
+    record reload. Session references to the old record are swapped to
+    the merged copy; the record is evicted when the re-read fails.
+    """
+    store = get_record_store()
+    try:
+        features = select_record(url, "globalid", guid, fields=",".join(fields), return_geometry=False)
+    except Exception:
+        features = None
+
+    record = store.merge(url, guid, features[0].get("attributes", {})) if features else None
+    if record is None:
+        store.evict(guid)
+        return None
+
+    for prefix in PROJECT_PREFIXES:
+        current = st.session_state.get(f"{prefix}_record")
+        if current is not None and current.key == record.key:
+            st.session_state[f"{prefix}_record"] = record
+    return record
+
+
 class AGOLQueryIntersect:
     def __init__(self, url, geometry, fields="*", return_geometry=False,
                  list_values=None, string_values=None):
@@ -223,6 +625,7 @@ class AGOLQueryIntersect:
         self.url = url
         self.geometry = self._swap_coords(geometry)
         self.fields = fields
+        self.requested_fields = parse_fields(fields)
         self.return_geometry = return_geometry
         self.list_values_field = list_values
         self.string_values_field = string_values
@@ -305,21 +708,11 @@ class AGOLQueryIntersect:
         if response.status_code != 200:
             raise Exception(f"Request failed with status code {response.status_code}: {response.text}")
 
-        data = response.json()
+        data = decode_response(response)
         if "error" in data:
             raise Exception(f"API Error: {data['error']['message']} - {data['error'].get('details', [])}")
 
-        results = []
-        requested_fields = [f.strip() for f in self.fields.split(",") if f.strip()]
-        for feature in data.get("features", []):
-            attributes = feature.get("attributes", {})
-            filtered_attrs = {f: attributes.get(f) for f in requested_fields} if self.fields != "*" else attributes
-            feature_package = {"attributes": filtered_attrs}
-            if self.return_geometry:
-                feature_package["geometry"] = feature.get("geometry", {})
-            results.append(feature_package)
-
-        return results
+        return project_features(data.get("features", []), self.requested_fields, self.return_geometry)
 
     def _extract_unique_values(self, field_name):
         if not self.results:
@@ -362,7 +755,7 @@ class AGOLDataLoader:
                 }
             )
             self.logger.info("Raw response text: %s", resp.text)
-            result = resp.json()
+            result = decode_response(resp)
 
             if "addResults" in result:
                 add_results = result["addResults"]
@@ -425,7 +818,7 @@ class AGOLDataLoader:
             )
 
             self.logger.info("Raw response text: %s", resp.text)
-            result = resp.json()
+            result = decode_response(resp)
 
             # Ensure updateResults exists
             if "updateResults" in result:
@@ -475,23 +868,164 @@ class AGOLDataLoader:
             "globalids": self.globalids
         }
 
-    
+    def _post_update_chunk(self, endpoint: str, chunk: list):
+        """One applyEdits call → (updated global IDs, failures)."""
+        updated = []
+        failures = []
+
+        try:
+            resp = requests.post(
+                endpoint,
+                data={
+                    "f": "json",
+                    "token": self.token,
+                    "updates": json.dumps(chunk)
+                }
+            )
+            result = decode_response(resp)
+
+            if "updateResults" not in result:
+                raise ValueError(f"Unexpected response: {result}")
+
+            for r in result["updateResults"]:
+                if r.get("success"):
+                    updated.append(r.get("globalId"))
+                else:
+                    err = r.get("error") or {}
+                    failures.append({
+                        "objectId": r.get("objectId"),
+                        "error": f"Code {err.get('code')}: {err.get('description')}"
+                    })
+
+        except Exception as e:
+            self.logger.exception("applyEdits chunk failed")
+            failures.extend(
+                {"objectId": f["attributes"].get("OBJECTID"), "error": str(e)} for f in chunk
+            )
+
+        return updated, failures
+
+    def update_features_batch(self, features: list, chunk_size: int = 500, max_workers: int = 1):
+        """
+        Sends many updates through applyEdits in chunks of chunk_size,
+        up to max_workers chunks in parallel.
+        Returns overall success, message, updated global IDs and failures.
+        """
+
+        endpoint = f"{self.url}/applyEdits"
+        self.logger.info("Starting update_features_batch for %d feature(s)...", len(features))
+
+        chunks = [features[i:i + chunk_size] for i in range(0, len(features), chunk_size)]
+        updated = []
+        failures = []
+
+        if max_workers > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                outcomes = list(pool.map(lambda c: self._post_update_chunk(endpoint, c), chunks))
+        else:
+            outcomes = [self._post_update_chunk(endpoint, c) for c in chunks]
+
+        for chunk_updated, chunk_failures in outcomes:
+            updated.extend(chunk_updated)
+            failures.extend(chunk_failures)
+
+        self.success = not failures
+        self.globalids = updated
+        self.message = (
+            f"Updated {len(updated)} feature(s), {len(failures)} failure(s)."
+        )
+        (self.logger.info if self.success else self.logger.error)(self.message)
+
+        return {
+            "success": self.success,
+            "message": self.message,
+            "globalids": self.globalids,
+            "failures": failures
+        }
+
+    def apply_edits(self, adds: list = None, deletes: list = None, chunk_size: int = 500):
+        """
+        Adds and deletes (OBJECTIDs) in as few applyEdits calls as possible:
+        each call carries up to chunk_size adds and chunk_size deletes.
+        Returns overall success, message, added global IDs, deleted
+        OBJECTIDs and failures.
+        """
+
+        endpoint = f"{self.url}/applyEdits"
+        adds = adds or []
+        deletes = deletes or []
+        self.logger.info("Starting apply_edits: %d add(s), %d delete(s)...", len(adds), len(deletes))
+
+        added = []
+        deleted = []
+        failures = []
+
+        for start in range(0, max(len(adds), len(deletes)), chunk_size):
+            data = {"f": "json", "token": self.token}
+            chunk_adds = adds[start:start + chunk_size]
+            chunk_deletes = deletes[start:start + chunk_size]
+            if chunk_adds:
+                data["adds"] = json.dumps(chunk_adds)
+            if chunk_deletes:
+                data["deletes"] = ",".join(str(oid) for oid in chunk_deletes)
+
+            try:
+                result = decode_response(requests.post(endpoint, data=data))
+                if "error" in result:
+                    raise ValueError(f"API Error: {result['error'].get('message')}")
+
+                for kind, results in (("add", result.get("addResults", [])),
+                                      ("delete", result.get("deleteResults", []))):
+                    for r in results:
+                        if r.get("success"):
+                            (added if kind == "add" else deleted).append(
+                                r.get("globalId") if kind == "add" else r.get("objectId")
+                            )
+                        else:
+                            err = r.get("error") or {}
+                            failures.append({
+                                "edit": kind,
+                                "objectId": r.get("objectId"),
+                                "error": f"Code {err.get('code')}: {err.get('description')}"
+                            })
+
+            except Exception as e:
+                self.logger.exception("applyEdits chunk failed")
+                failures.extend({"edit": "add", "objectId": None, "error": str(e)} for _ in chunk_adds)
+                failures.extend({"edit": "delete", "objectId": oid, "error": str(e)} for oid in chunk_deletes)
+
+        self.success = not failures
+        self.globalids = added
+        self.message = (
+            f"Added {len(added)}, deleted {len(deleted)} feature(s), {len(failures)} failure(s)."
+        )
+        (self.logger.info if self.success else self.logger.error)(self.message)
+
+        return {
+            "success": self.success,
+            "message": self.message,
+            "globalids": added,
+            "deleted": deleted,
+            "failures": failures
+        }
+
 
 
 
 class AGOLRecordLoader:
     """
-    Loads a single AGOL record using select_record() and stores
-    all attributes + geometry into Streamlit session_state.
+    Loads a single AGOL record using select_record() and publishes it
+    to the process-wide RecordStore. Session state only holds a reference
+    to the shared ProjectRecord under "<prefix>_record".
 
     Access values through:
         loader.attributes
         loader.geometry
-        loader.<fieldname>  (dynamic attributes)
+        loader.<fieldname>  (resolved from the shared record)
     """
 
     def __init__(self, url, id_field, id_value,
-                 prefix="", fields="*", return_geometry=True):
+                 prefix="", fields="*", return_geometry=True, max_age=None):
 
         self.url = url
         self.id_field = id_field
@@ -502,24 +1036,46 @@ class AGOLRecordLoader:
         # Normalize prefix
         self.prefix = prefix.rstrip("_") + "_" if prefix else ""
 
-        # Fetch the record
-        self.record = self._fetch_record()
-
-        # Extract attributes + geometry
-        self.attributes = self.record.get("attributes", {})
-        self.geometry = self.record.get("geometry", None)
-
-        # Store in session_state
+        # Reject a malformed GUID here, before it can reach (and trip) the
+        # host's circuit breaker
+        if id_field.lower() in GUID_FIELDS:
+            normalize_guid(id_value)
+
+        # Re-use a record fetched (or prefetched) within max_age seconds,
+        # otherwise fetch it and intern it in the shared store
+        store = get_record_store()
+        self.record = store.get(self.url, self.id_value, max_age, fields, return_geometry) if max_age else None
+        self.stale = False
+        if self.record is None:
+            try:
+                # A recently synced local mirror answers without calling AGOL
+                results = self._mirror_record() or \
+                    get_swr_cache().breaker(self.url).call(self._fetch_record)
+            except Exception:
+                # AGOL unreachable (or its breaker open): keep serving the
+                # last good copy if there is one
+                self.record = store.get(self.url, self.id_value, fields=fields, return_geometry=return_geometry)
+                if self.record is None:
+                    raise
+                self.stale = True
+            else:
+                # An empty result is a missing record, not an outage, so it
+                # is raised outside the breaker
+                if not results:
+                    raise ValueError(f"No record found for {self.id_field} = {self.id_value}")
+                # select_record returns a list → take the first feature
+                self.record = store.put(ProjectRecord.from_feature(
+                    self.url, self.id_value, results[0], self.fields, self.return_geometry
+                ))
+
+        # Reference the shared record from session_state
         self._store_in_session_state()
 
-        # Create dynamic attributes for direct access
-        self._create_dynamic_attributes()
-
     # ---------------------------------------------------------
     # Fetch record from AGOL
     # ---------------------------------------------------------
     def _fetch_record(self):
-        results = select_record(
+        return select_record(
             url=self.url,
             id_field=self.id_field,
             id_value=self.id_value,
@@ -527,31 +1083,35 @@ class AGOLRecordLoader:
             return_geometry=self.return_geometry
         )
 
-        if not results:
-            raise ValueError(f"No record found for {self.id_field} = {self.id_value}")
-
-        # select_record returns a list → take the first feature
-        return results[0]
+    # ---------------------------------------------------------
+    # Read the record from the local mirror (full records only)
+    # ---------------------------------------------------------
+    def _mirror_record(self):
+        if self.fields != "*" or self.id_field.lower() != "globalid":
+            return None
+        mirror, layer = local_mirror_for(self.url, st.session_state.get("use_local_mirror", False))
+        return mirror.select_record(layer, self.id_value) if mirror else None
 
     # ---------------------------------------------------------
-    # Store values in Streamlit session_state
+    # Reference the shared record from Streamlit session_state
     # ---------------------------------------------------------
     def _store_in_session_state(self):
-        for key, value in self.attributes.items():
-            lower_key = key.lower()
-            st.session_state[f"{self.prefix}{lower_key}"] = value
-
-        # Geometry stored as lowercase too
-        st.session_state[f"{self.prefix}geometry"] = self.geometry
+        st.session_state[f"{self.prefix}record"] = self.record
 
     # ---------------------------------------------------------
-    # Create dynamic attributes for direct access
+    # Attribute access (no per-field copies)
     # ---------------------------------------------------------
-    def _create_dynamic_attributes(self):
-        for key, value in self.attributes.items():
-            lower_key = key.lower()
-            setattr(self, lower_key, value)
-
-        setattr(self, "geometry", self.geometry)
-
-
+    @property
+    def attributes(self):
+        return self.record.attributes
+
+    @property
+    def geometry(self):
+        return self.record.geometry
+
+    def __getattr__(self, name):
+        # Only called when normal lookup fails → resolve from the record
+        record = self.__dict__.get("record")
+        if record is not None and name in record.attributes:
+            return record.attributes[name]
+        raise AttributeError(name)
@@ -0,0 +1,403 @@
+"""
+Headless bulk import/export for APEX layers.
+
+    python apex_cli.py export projects --format csv --out projects.csv
+    python apex_cli.py export sites --format geojson --out sites.geojson
+    python apex_cli.py import projects changes.csv --dry-run
+    python apex_cli.py import projects changes.csv --workers 4 --checkpoint changes.ckpt
+
+Layers may be given as an APEX key ("projects" / "projects_url") or a full URL.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+
+from init_session import APEX_URLS
+from agol_query import in_chunks
+from agol_util import query_features, AGOLDataLoader, format_guid
+from layer_schema import get_layer_schema, coerce_frame
+from change_log import get_change_log
+from esri_geojson import esri_to_geojson
+
+
+logger = logging.getLogger("apex_cli")
+
+# Rows read from the import CSV (and diffed/pushed) at a time
+IMPORT_CHUNK_ROWS = 1000
+
+# Longest IN (...) list sent in one query
+IN_LIST_SIZE = 250
+
+
+
+def resolve_layer(name: str) -> str:
+    if name.startswith("http"):
+        return name.rstrip("/")
+    for key in (name, f"{name}_url"):
+        if key in APEX_URLS:
+            return APEX_URLS[key]
+    raise SystemExit(f"Unknown layer '{name}'. Choose from: {', '.join(APEX_URLS)}")
+
+
+
+# ---------------------------------------------------------
+# Export (streamed page by page)
+# ---------------------------------------------------------
+def _export_csv(pages, out, schema=None):
+    writer = None
+    with open(out, "w", newline="", encoding="utf-8") as f:
+        for page in pages:
+            rows = [feature.get("attributes", {}) for feature in page]
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]), extrasaction="ignore")
+                writer.writeheader()
+            writer.writerows(rows)
+
+
+def _arrow_type(pa, info):
+    """Arrow type for a layer field, so every page is written with the same schema."""
+    types = {
+        "esriFieldTypeSmallInteger": pa.int16(),
+        "esriFieldTypeInteger": pa.int32(),
+        "esriFieldTypeBigInteger": pa.int64(),
+        "esriFieldTypeOID": pa.int64(),
+        "esriFieldTypeSingle": pa.float32(),
+        "esriFieldTypeDouble": pa.float64(),
+        "esriFieldTypeDate": pa.timestamp("ms", tz="UTC"),
+        "esriFieldTypeDateOnly": pa.date32(),
+    }
+    return types.get(info.type, pa.string()) if info else pa.string()
+
+
+def _export_parquet(pages, out, schema=None):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet export requires pyarrow (pip install pyarrow).")
+    if schema is None:
+        raise SystemExit("Layer schema unavailable; Parquet export needs the field types.")
+
+    # The Arrow schema comes from the layer's field types, not from the first
+    # page (an all-null or whole-number column would be inferred wrongly)
+    writer = None
+    date_only = []
+    try:
+        for page in pages:
+            rows = [feature.get("attributes", {}) for feature in page]
+            if writer is None:
+                arrow_schema = pa.schema([(name, _arrow_type(pa, schema.field(name))) for name in rows[0]])
+                date_only = [name for name in rows[0]
+                             if schema.field(name) and schema.field(name).type == "esriFieldTypeDateOnly"]
+                writer = pq.ParquetWriter(out, arrow_schema)
+
+            # DateOnly values arrive as 'YYYY-MM-DD' strings
+            for row in rows:
+                for name in date_only:
+                    if row.get(name):
+                        row[name] = date.fromisoformat(row[name][:10])
+
+            writer.write_table(pa.Table.from_pylist(rows, schema=writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _export_geojson(pages, out, schema=None):
+    with open(out, "w", encoding="utf-8") as f:
+        f.write('{"type": "FeatureCollection", "features": [\n')
+        first = True
+        for page in pages:
+            for feature in page:
+                record = {
+                    "type": "Feature",
+                    "geometry": esri_to_geojson(feature.get("geometry")),
+                    "properties": feature.get("attributes", {})
+                }
+                f.write(("" if first else ",\n") + json.dumps(record, separators=(",", ":")))
+                first = False
+        f.write("\n]}\n")
+
+
+EXPORTERS = {
+    "csv": _export_csv,
+    "parquet": _export_parquet,
+    "geojson": _export_geojson,
+}
+
+
+def export_layer(url: str, fmt: str, out: str, where: str = "1=1", fields="*", page_size: int = 2000):
+    counted = {"features": 0}
+
+    def pages():
+        for page in query_features(url, where=where, fields=fields,
+                                   return_geometry=fmt == "geojson", page_size=page_size):
+            counted["features"] += len(page)
+            logger.info("Exported %d feature(s)", counted["features"])
+            yield page
+
+    EXPORTERS[fmt](pages(), out, get_layer_schema(url))
+    return counted["features"]
+
+
+
+# ---------------------------------------------------------
+# Import (validated, diffed, chunked applyEdits)
+# ---------------------------------------------------------
+class ImportValidationError(ValueError):
+    pass
+
+
+def validate_columns(columns, schema, key: str):
+    if schema is None:
+        raise ImportValidationError("Layer schema unavailable; refusing to import unvalidated data.")
+
+    unknown = [c for c in columns if schema.field(c) is None]
+    if unknown:
+        raise ImportValidationError(f"Unknown field(s): {', '.join(unknown)}")
+
+    read_only = [c for c in columns if c.lower() not in (key, "objectid") and not schema.field(c).editable]
+    if read_only:
+        raise ImportValidationError(f"Read-only field(s): {', '.join(read_only)}")
+
+
+def validate_guids(values: pd.Series, first_row: int):
+    """Every key value must be a GUID; otherwise it could never match a feature."""
+    problems = [
+        f"row {first_row + idx}: globalid value {value!r} is not a GUID"
+        for idx, value in values.items() if format_guid(value) is None
+    ]
+    if problems:
+        raise ImportValidationError("\n".join(problems[:50]))
+
+
+def validate_values(raw: pd.DataFrame, typed: pd.DataFrame, schema, first_row: int) -> list:
+    """Row-level problems in a chunk (empty list when valid)."""
+    problems = []
+    for column in typed.columns:
+        info = schema.field(column)
+        values = typed[column]
+
+        unparsed = raw[column].notna() & values.isna()
+        for idx in values.index[unparsed]:
+            problems.append(f"row {first_row + idx}: {column} value {raw[column][idx]!r} is not a valid {info.type}")
+
+        if not info.nullable:
+            for idx in values.index[raw[column].isna()]:
+                problems.append(f"row {first_row + idx}: {column} may not be empty")
+
+        if info.length and info.type == "esriFieldTypeString":
+            too_long = values.astype("string").str.len() > info.length
+            for idx in values.index[too_long.fillna(False).astype(bool)]:
+                problems.append(f"row {first_row + idx}: {column} exceeds {info.length} characters")
+
+        if info.domain:
+            invalid = values.notna() & ~values.isin(list(info.domain))
+            for idx in values.index[invalid]:
+                problems.append(f"row {first_row + idx}: {column} value {values[idx]!r} not in domain")
+
+    return problems
+
+
+def _fetch_current(url: str, key: str, ids: list, fields: list) -> pd.DataFrame:
+    """Current values for the rows being imported, keyed by the key column."""
+    frames = []
+    values = ids if key == "globalid" else [int(v) for v in ids]
+    # GlobalID too: the change log is keyed by project GUID
+    extra = [] if key == "globalid" else ["GlobalID"]
+    for where in in_chunks(key, values, IN_LIST_SIZE):
+        for page in query_features(url, where=where, fields=["OBJECTID", *extra, key, *fields]):
+            frames.append(pd.DataFrame(
+                [{k.lower(): v for k, v in f["attributes"].items()} for f in page]
+            ))
+
+    if not frames:
+        return pd.DataFrame(columns=list(dict.fromkeys(["objectid", "globalid", key, *fields])))
+    return pd.concat(frames, ignore_index=True)
+
+
+def diff_chunk(incoming: pd.DataFrame, current: pd.DataFrame, key: str) -> tuple:
+    """Return (long-format diff rows, applyEdits update features)."""
+    fields = [c for c in incoming.columns if c not in (key, "objectid")]
+    merged = incoming.merge(current, on=key, how="left", suffixes=("", "__current"), indicator=True)
+
+    missing = merged["_merge"] == "left_only"
+    if missing.any():
+        logger.warning("%d row(s) have no matching feature and are skipped", int(missing.sum()))
+    merged = merged[~missing]
+
+    # OBJECTID always comes from the layer, never from the CSV
+    if key == "objectid":
+        oid_column = "objectid"
+    else:
+        oid_column = "objectid__current" if "objectid" in incoming.columns else "objectid"
+
+    guids = merged["globalid"] if "globalid" in merged.columns else pd.Series(None, index=merged.index)
+
+    diffs = []
+    updates = {}
+    for field in fields:
+        new = merged[field]
+        old = merged[f"{field}__current"]
+        changed = ((new != old).fillna(True) & ~(new.isna() & old.isna())).astype(bool)
+
+        for oid, guid, o, n in zip(merged.loc[changed, oid_column], guids[changed], old[changed], new[changed]):
+            oid = int(oid)
+            o = None if pd.isna(o) else o
+            n = None if pd.isna(n) else n
+            diffs.append({"objectid": oid, "globalid": guid, "field": field, "old": o, "new": n})
+            updates.setdefault(oid, {"OBJECTID": oid})[field] = n.item() if hasattr(n, "item") else n
+
+    return diffs, [{"attributes": attrs} for attrs in updates.values()]
+
+
+def _plain(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+def _log_changes(diffs: list, result: dict):
+    """Append the diffs of every successfully updated feature to the change log."""
+    failed = {f.get("objectId") for f in result["failures"]}
+    rows = [
+        (d["globalid"], "csv import", d["field"], _plain(d["old"]), _plain(d["new"]))
+        for d in diffs
+        if d["objectid"] not in failed and format_guid(d["globalid"])
+    ]
+    get_change_log().record_many(rows)
+
+
+def _load_checkpoint(path: str, csv_path: str) -> int:
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("csv") != os.path.abspath(csv_path):
+        raise SystemExit(f"Checkpoint {path} belongs to a different file ({state.get('csv')}).")
+    return int(state.get("rows_done", 0))
+
+
+def _save_checkpoint(path: str, csv_path: str, rows_done: int):
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"csv": os.path.abspath(csv_path), "rows_done": rows_done}, f)
+    os.replace(tmp, path)
+
+
+def import_changes(url: str, csv_path: str, key: str = "objectid", dry_run: bool = False,
+                   checkpoint: str = None, chunk_size: int = 500, workers: int = 4) -> dict:
+    key = key.lower()
+    schema = get_layer_schema(url)
+    rows_done = _load_checkpoint(checkpoint, csv_path)
+    summary = {"rows": rows_done, "changed_features": 0, "failures": [], "diffs": []}
+
+    # The checkpoint only moves past chunks whose edits all succeeded, so a
+    # resumed run retries failed features (applied ones no longer diff)
+    advance = not dry_run
+    loader = None if dry_run else AGOLDataLoader(url)
+
+    reader = pd.read_csv(csv_path, chunksize=IMPORT_CHUNK_ROWS, dtype=object, keep_default_na=False,
+                         na_values=[""], skiprows=range(1, rows_done + 1))
+    for chunk in reader:
+        chunk = chunk.reset_index(drop=True)
+        chunk.columns = [c.strip().lower() for c in chunk.columns]
+        if key not in chunk.columns:
+            raise ImportValidationError(f"Key column '{key}' missing from {csv_path}")
+        validate_columns(chunk.columns, schema, key)
+        if key == "globalid":
+            validate_guids(chunk[key], rows_done + 1)
+
+        typed = coerce_frame(chunk, schema, to_agol=True)
+        problems = validate_values(chunk.drop(columns=[key]), typed.drop(columns=[key]), schema, rows_done + 1)
+        if problems:
+            raise ImportValidationError("\n".join(problems[:50]))
+
+        fields = [c for c in typed.columns if c not in (key, "objectid")]
+        current = coerce_frame(
+            _fetch_current(url, key, typed[key].dropna().tolist(), fields), schema, to_agol=True
+        )
+        if key == "globalid":
+            typed[key] = typed[key].map(format_guid)
+            current[key] = current[key].map(format_guid)
+
+        diffs, updates = diff_chunk(typed, current, key)
+        summary["diffs"].extend(diffs)
+        summary["changed_features"] += len(updates)
+
+        if updates and loader is not None:
+            result = loader.update_features_batch(updates, chunk_size=chunk_size, max_workers=workers)
+            summary["failures"].extend(result["failures"])
+            _log_changes(diffs, result)
+            if result["failures"]:
+                advance = False
+
+        rows_done += len(chunk)
+        summary["rows"] = rows_done
+        if advance:
+            _save_checkpoint(checkpoint, csv_path, rows_done)
+        logger.info("Processed %d row(s), %d feature(s) changed", rows_done, summary["changed_features"])
+
+    return summary
+
+
+
+# ---------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export for APEX layers.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="stream a layer to CSV, Parquet or GeoJSON")
+    exp.add_argument("layer")
+    exp.add_argument("--format", choices=sorted(EXPORTERS), default="csv")
+    exp.add_argument("--out", required=True)
+    exp.add_argument("--where", default="1=1")
+    exp.add_argument("--fields", default="*", help="comma separated field list")
+    exp.add_argument("--page-size", type=int, default=2000)
+
+    imp = sub.add_parser("import", help="apply attribute changes from a CSV")
+    imp.add_argument("layer")
+    imp.add_argument("csv")
+    imp.add_argument("--key", default="objectid", choices=["objectid", "globalid"])
+    imp.add_argument("--dry-run", action="store_true", help="print the diff without writing")
+    imp.add_argument("--checkpoint", help="resume file recording rows already applied")
+    imp.add_argument("--chunk-size", type=int, default=500, help="features per applyEdits call")
+    imp.add_argument("--workers", type=int, default=4, help="parallel applyEdits calls")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    url = resolve_layer(args.layer)
+
+    if args.command == "export":
+        count = export_layer(url, args.format, args.out, where=args.where,
+                             fields=args.fields, page_size=args.page_size)
+        print(f"Exported {count} feature(s) to {args.out}")
+        return 0
+
+    try:
+        summary = import_changes(url, args.csv, key=args.key, dry_run=args.dry_run,
+                                 checkpoint=args.checkpoint, chunk_size=args.chunk_size,
+                                 workers=args.workers)
+    except ImportValidationError as e:
+        print(f"Validation failed:\n{e}", file=sys.stderr)
+        return 2
+
+    if args.dry_run:
+        for diff in summary["diffs"]:
+            print(f"{diff['objectid']}\t{diff['field']}\t{diff['old']!r} → {diff['new']!r}")
+
+    print(f"{summary['rows']} row(s) read, {summary['changed_features']} feature(s) "
+          f"{'would change' if args.dry_run else 'changed'}, {len(summary['failures'])} failure(s)")
+    return 1 if summary["failures"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
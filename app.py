@@ -1,9 +1,23 @@
 import streamlit as st
+from startup_metrics import lazy_import, mark_first_paint, start_run
+start_run()
+
 from init_session import init_session_state
-from agol_util import get_multiple_fields, select_record
+from agol_util import format_guid, local_mirror_for
+from agol_cache import cached_multiple_fields, staleness_note
+from record_store import evict_stale_project
 from information import information_tab
-from geometry import geometry_tab
 from instructions import instructions
+from dashboard import portfolio_dashboard
+from compare import compare_view
+from prefetch import prefetch_likely_next
+from notifications import flush_notifications
+
+# Geometry, routes, communities, contacts, the change log and the local
+# mirror pull in shapely, pyproj, folium and sqlite; they are imported via
+# lazy_import() only when their page is selected, on the first save (change
+# log) or when the mirror is enabled. pandas still loads at startup through
+# layer_schema, the dashboard and the compare view.
 
 # ---------------------------------------------------------
 # Initialize Session State
@@ -30,10 +44,19 @@ if version_param:
     st.session_state["version"] = version_param
 
 # Sync GUID from URL into session_state
+# (normalized once, so record and cache keys match the project list)
+guid_param = format_guid(guid_param) or guid_param
 if guid_param and guid_param != st.session_state.get("guid"):
     st.session_state["guid"] = guid_param
     st.rerun()
 
+# Drop session data left over from a previously loaded project
+evict_stale_project(st.session_state["guid"])
+
+# Toasts queued before the previous st.rerun() (flushed after the
+# URL sync above, whose own rerun would otherwise drop them)
+flush_notifications()
+
 
 
 
@@ -41,14 +64,23 @@ if guid_param and guid_param != st.session_state.get("guid"):
 # Load Project List
 # ---------------------------------------------------------
 try:
-    projects = get_multiple_fields(st.session_state['projects_url'], ["Proj_Name", "globalid"])
+    # Same freshness rule as record loads: only a recently synced mirror
+    mirror, layer = local_mirror_for(st.session_state["projects_url"], st.session_state["use_local_mirror"])
+    if mirror is not None:
+        projects = mirror.all_attributes(layer, ["Proj_Name", "globalid"])
+    else:
+        cached = cached_multiple_fields(st.session_state['projects_url'], ["Proj_Name", "globalid"])
+        projects = cached.value
+        note = staleness_note(cached, "project list")
+        if note:
+            st.caption(f"⚠️ {note}")
 except Exception as e:
     st.error(f"Failed to load project list: {e}")
     projects = []
 
 # Build mapping: Proj_Name → GlobalID
 label_to_gid = {
-    p.get("Proj_Name"): p.get("globalid")
+    p.get("Proj_Name"): format_guid(p.get("globalid")) or p.get("globalid")
     for p in projects
     if p.get("Proj_Name") and p.get("globalid")
 }
@@ -95,6 +127,14 @@ if not st.session_state["guid"]:
     # Info message stays directly below the dropdown
     st.info("Select an APEX project to view and edit project information.")
 
+    # Portfolio-wide aggregates (server-side statistics only)
+    st.write("")
+    portfolio_dashboard()
+
+    # Side-by-side review of several projects (one batch query)
+    st.write("")
+    compare_view(label_to_gid)
+
 else:
     # Project selected → show name under the return button
     if current_label:
@@ -102,28 +142,40 @@ else:
     else:
         st.warning("Selected GUID not found in project list.")
 
+mark_first_paint()
+
 
 
 
 
 
 # ---------------------------------------------------------
-# Display Tabs When GUID Is Selected
+# Display Pages When GUID Is Selected
+#
+# A radio rather than st.tabs: st.tabs runs every tab's body on each
+# rerun, so every page's AGOL calls and heavy imports ran regardless of
+# which one was open. Only the selected page runs now.
 # ---------------------------------------------------------
 if st.session_state["guid"]:
 
-    info, geom, geography, routes, comm, contacts, status_deploy = st.tabs([
-        "INFORMATION",
-        "GEOMETRY",
-        "GEOGRAPHY",
-        "ROUTES",
-        "COMMUNITIES",
-        "CONTACTS",
-        "STATUS & DEPLOYMENT"
-    ])
+    page = st.radio(
+        "Page",
+        [
+            "INFORMATION",
+            "GEOMETRY",
+            "GEOGRAPHY",
+            "ROUTES",
+            "COMMUNITIES",
+            "CONTACTS",
+            "STATUS & DEPLOYMENT"
+        ],
+        horizontal=True,
+        label_visibility="collapsed",
+        key="project_page"
+    )
 
 
-    with info:
+    if page == "INFORMATION":
         st.write('')
         st.markdown("<h4>PROJECT INFORMATION 📄</h4>", unsafe_allow_html=True)
         st.write(
@@ -137,20 +189,27 @@ if st.session_state["guid"]:
         st.write("")
         information_tab()
 
-    with geom:
-        geometry_tab()
+    elif page == "GEOMETRY":
+        lazy_import("geometry").geometry_tab()
 
-    with geography:
+    elif page == "GEOGRAPHY":
         st.write("Content")
 
-    with routes:
-        st.write("Content")
+    elif page == "ROUTES":
+        lazy_import("routes").routes_tab()
 
-    with comm:
-        st.write("Content")
+    elif page == "COMMUNITIES":
+        lazy_import("communities").communities_tab()
 
-    with contacts:
-        st.write("Content")
+    elif page == "CONTACTS":
+        lazy_import("contacts").contacts_tab()
 
-    with status_deploy:
-        st.write("Content")
+    elif page == "STATUS & DEPLOYMENT":
+        lazy_import("change_log").change_log_tab()
+
+    # Warm the record cache for the projects likely to be opened next
+    prefetch_likely_next(
+        st.session_state["projects_url"],
+        st.session_state["guid"],
+        [label_to_gid[label] for label in labels]
+    )
@@ -0,0 +1,98 @@
+"""
+Decode + projection benchmark for AGOL query responses.
+
+Builds synthetic query bodies shaped like the projects layer and times
+the old path (stdlib json + per-feature dict copies) against agol_json.
+
+    python benchmarks/decode_bench.py
+    python benchmarks/decode_bench.py --sizes 10000 100000 --repeat 5
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import agol_json  # noqa: E402
+
+
+FIELDS = ["OBJECTID", "globalid", "Proj_Name", "Phase", "Awarded_Amount", "Construction_Year",
+          "Proj_Desc", "EditDate"]
+REQUESTED = ["Proj_Name", "globalid"]
+
+
+def make_body(n: int) -> bytes:
+    rng = random.Random(n)
+    features = [{
+        "attributes": {
+            "OBJECTID": i,
+            "globalid": f"{{{i:08X}-0000-4000-8000-{rng.getrandbits(48):012X}}}",
+            "Proj_Name": f"Project {i}",
+            "Phase": rng.choice(["Planning", "Design", "Construction", "Complete"]),
+            "Awarded_Amount": rng.random() * 1e7,
+            "Construction_Year": rng.randint(2000, 2030),
+            "Proj_Desc": "x" * rng.randint(20, 200),
+            "EditDate": 1700000000000 + i * 1000,
+        }
+    } for i in range(n)]
+    return json.dumps({"fields": [{"name": f} for f in FIELDS], "features": features}).encode()
+
+
+def old_path(body: bytes):
+    data = json.loads(body)
+    results = []
+    for feature in data.get("features", []):
+        attributes = feature.get("attributes", {})
+        results.append({f: attributes.get(f) for f in REQUESTED})
+    return results
+
+
+def new_rows(body: bytes):
+    data = agol_json.loads(body)
+    return [feature.get("attributes", {}) for feature in data.get("features", [])]
+
+
+def new_columns(body: bytes):
+    data = agol_json.loads(body)
+    return agol_json.FeatureColumns.from_features(data["features"], REQUESTED)
+
+
+def measure(fn, body: bytes, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(body)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    parser_name = "orjson" if agol_json.orjson is not None else "json (orjson not installed)"
+    print(f"parser: {parser_name}")
+    print(f"{'features':>9}  {'path':<22}{'best (ms)':>10}  {'peak (MB)':>10}")
+
+    for n in args.sizes:
+        body = make_body(n)
+        for name, fn in (("json + dict copies", old_path), ("agol_json rows", new_rows),
+                         ("agol_json columns", new_columns)):
+            seconds, peak = measure(fn, body, args.repeat)
+            print(f"{n:>9}  {name:<22}{seconds * 1000:>10.1f}  {peak / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cold-import cost of the app's modules, measured in a fresh interpreter
+with `python -X importtime` so cached modules don't hide regressions.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget-ms 800
+
+Exits non-zero when the startup path (STARTUP_MODULES) exceeds the budget.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# Imported by app.py before the first paint
+STARTUP_MODULES = ["init_session", "agol_cache", "record_store", "information", "instructions",
+                   "dashboard", "compare", "prefetch"]
+
+# Imported lazily when their page is selected
+TAB_MODULES = ["geometry", "routes", "communities", "contacts", "change_log", "agol_sync"]
+
+
+def import_times(modules: list) -> dict:
+    """
+    Import modules in order in one fresh process; returns the cumulative
+    time (ms) of each, so later modules only pay for what is new to them.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    # Lines look like: "import time:   self [us] |  cumulative | imported package"
+    times = {}
+    for line in proc.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] in modules:
+            times[parts[2]] = int(parts[1]) / 1000
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail when the startup modules together take longer than this")
+    args = parser.parse_args()
+
+    try:
+        startup = import_times(STARTUP_MODULES)
+    except RuntimeError as e:
+        sys.exit(f"startup import failed: {e}")
+
+    for module, ms in startup.items():
+        print(f"startup  {module:<16}{ms:>9.1f} ms")
+    total = sum(startup.values())
+    print(f"startup  {'total':<16}{total:>9.1f} ms")
+
+    # Marginal cost of each lazy module on top of the startup path
+    for module in TAB_MODULES:
+        try:
+            ms = import_times([*STARTUP_MODULES, module]).get(module, 0.0)
+        except RuntimeError as e:
+            print(f"lazy     {module:<16}failed: {e}")
+            continue
+        print(f"lazy     {module:<16}{ms:>9.1f} ms")
+
+    if args.budget_ms is not None and total > args.budget_ms:
+        sys.exit(f"startup imports over budget by {total - args.budget_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from agol_util import format_guid
+from init_session import load_credentials
+from layer_schema import coerce_record
+
+
+CHANGE_LOG_PATH = os.path.join(".cache", "change_log.sqlite")
+
+TIMELINE_LIMIT = 500
+
+# Field and user names are stored once and referenced by id
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS names (
+    id      INTEGER PRIMARY KEY,
+    name    TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS changes (
+    id          INTEGER PRIMARY KEY,
+    guid        TEXT    NOT NULL,
+    changed_at  INTEGER NOT NULL,
+    section     INTEGER NOT NULL REFERENCES names (id),
+    field       INTEGER NOT NULL REFERENCES names (id),
+    user        INTEGER NOT NULL REFERENCES names (id),
+    old         TEXT,
+    new         TEXT
+);
+CREATE INDEX IF NOT EXISTS changes_guid_time ON changes (guid, changed_at);
+CREATE INDEX IF NOT EXISTS changes_time ON changes (changed_at);
+"""
+
+
+
+def current_user() -> str:
+    """Signed-in user's email when the app has auth, else the AGOL account."""
+    try:
+        email = st.user.get("email")
+        if email:
+            return email
+    except Exception:
+        pass
+    return load_credentials()[0] or "unknown"
+
+
+def _encode(value) -> str:
+    return None if value is None else json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _decode(text):
+    return None if text is None else json.loads(text)
+
+
+def _normalized(values: dict, fields: list, schema) -> dict:
+    """`fields` of values in display form (dates, domain names), '' as None."""
+    lowered = {k.lower(): v for k, v in (values or {}).items()}
+    picked = coerce_record({f: lowered.get(f.lower()) for f in fields}, schema)
+    return {f: None if v == "" else v for f, v in picked.items()}
+
+
+def changed_fields(old: dict, new: dict, schema=None) -> list:
+    """
+    (field, old, new) for every key of `new` whose value differs from
+    `old`. Both sides are normalized the same way first, so epoch-ms vs
+    date or '' vs None is not logged as an edit.
+    """
+    fields = [f for f in new if f.upper() != "OBJECTID"]
+    before = _normalized(old, fields, schema)
+    after = _normalized(new, fields, schema)
+    return [(f, before[f], after[f]) for f in fields if before[f] != after[f]]
+
+
+
+# ---------------------------------------------------------
+# Append-only change log
+# ---------------------------------------------------------
+class ChangeLog:
+    """
+    Append-only SQLite log of applied edits, one row per changed field.
+    Rows are never updated or deleted; the (guid, changed_at) index
+    serves a project's timeline without touching AGOL.
+    """
+
+    def __init__(self, path: str = CHANGE_LOG_PATH):
+        self.path = path
+        self._names = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _name_id(self, conn, name: str) -> int:
+        name = str(name)
+        if name not in self._names:
+            conn.execute("INSERT OR IGNORE INTO names (name) VALUES (?)", (name,))
+            self._names[name] = conn.execute("SELECT id FROM names WHERE name = ?", (name,)).fetchone()[0]
+        return self._names[name]
+
+    def record(self, guid: str, section: str, changes: list, user: str = None, changed_at: float = None) -> int:
+        """Append (field, old, new) changes for one project; returns rows written."""
+        return self.record_many([(guid, section, field, old, new) for field, old, new in changes], user, changed_at)
+
+    def record_many(self, rows: list, user: str = None, changed_at: float = None) -> int:
+        """Append (guid, section, field, old, new) rows sharing a user and time."""
+        if not rows:
+            return 0
+
+        stamp = int((changed_at or time.time()) * 1000)
+        user = user or current_user()
+        with self._lock:
+            try:
+                with self._connect() as conn:
+                    user_id = self._name_id(conn, user)
+                    conn.executemany(
+                        "INSERT INTO changes (guid, changed_at, section, field, user, old, new) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (format_guid(guid) or guid, stamp, self._name_id(conn, section),
+                             self._name_id(conn, field), user_id, _encode(old), _encode(new))
+                            for guid, section, field, old, new in rows
+                        ]
+                    )
+            except Exception:
+                # Name ids cached inside a rolled-back transaction are invalid
+                self._names.clear()
+                raise
+        return len(rows)
+
+    def timeline(self, guid: str, since: float = None, limit: int = TIMELINE_LIMIT) -> pd.DataFrame:
+        """A project's changes, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT c.changed_at, s.name AS section, f.name AS field, u.name AS user, c.old, c.new
+                FROM changes c
+                JOIN names s ON s.id = c.section
+                JOIN names f ON f.id = c.field
+                JOIN names u ON u.id = c.user
+                WHERE c.guid = ? AND c.changed_at >= ?
+                ORDER BY c.changed_at DESC, c.id DESC
+                LIMIT ?
+                """,
+                (format_guid(guid) or guid, int((since or 0) * 1000), limit)
+            ).fetchall()
+
+        frame = pd.DataFrame([dict(r) for r in rows],
+                             columns=["changed_at", "section", "field", "user", "old", "new"])
+        frame["changed_at"] = pd.to_datetime(frame["changed_at"], unit="ms", utc=True)
+        frame["old"] = frame["old"].map(_decode)
+        frame["new"] = frame["new"].map(_decode)
+        return frame
+
+
+@st.cache_resource
+def get_change_log() -> ChangeLog:
+    return ChangeLog()
+
+
+
+# ---------------------------------------------------------
+# Status & deployment tab
+# ---------------------------------------------------------
+def change_log_tab():
+
+    st.write('')
+    st.markdown("<h4>CHANGE HISTORY 🕒</h4>", unsafe_allow_html=True)
+
+    timeline = get_change_log().timeline(st.session_state["guid"])
+    if timeline.empty:
+        st.info("No changes have been recorded for this project yet.")
+        return
+
+    fields = sorted(timeline["field"].unique())
+    selected = st.multiselect("Fields", fields, key="change_log_fields")
+    if selected:
+        timeline = timeline[timeline["field"].isin(selected)]
+
+    # One entry per save: same time, user and section
+    for (changed_at, user, section), group in timeline.groupby(
+        ["changed_at", "user", "section"], sort=False
+    ):
+        with st.container(border=True):
+            st.markdown(f"**{section.title()}** · {user} · {changed_at:%Y-%m-%d %H:%M} UTC")
+            st.dataframe(
+                group[["field", "old", "new"]].astype(str).rename(
+                    columns={"field": "Field", "old": "Old", "new": "New"}
+                ),
+                hide_index=True,
+                use_container_width=True
+            )
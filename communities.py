@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+import shapely
+import streamlit as st
+from shapely.geometry import shape
+
+from agol_query import eq
+from agol_util import query_features
+from esri_geojson import esri_to_geojson
+from geometry_pipeline import reproject, STORAGE_WKID, WORK_EPSG, METERS_PER_MILE
+
+
+# Fields on the communities layer
+COMMUNITY_NAME_FIELD = "community_name"
+
+# Field on the sites/routes layers pointing at the parent project
+PARENT_FIELD = "parentglobalid"
+
+DEFAULT_RADIUS_MI = 10
+
+
+
+# ---------------------------------------------------------
+# Proximity index
+# ---------------------------------------------------------
+class CommunityIndex:
+    """
+    STRtree over community points in Alaska Albers (meters), answering
+    "which communities are within d of these geometries" for a whole
+    batch of geometries in one call.
+    """
+
+    def __init__(self, names: np.ndarray, points_wgs84: np.ndarray):
+        self.names = names
+        self.points_wgs84 = points_wgs84
+        self.points = reproject(points_wgs84, STORAGE_WKID, WORK_EPSG)
+        self.tree = shapely.STRtree(self.points)
+
+    @classmethod
+    def from_layer(cls, url: str, where: str = "1=1") -> "CommunityIndex":
+        names, xs, ys = [], [], []
+        seen = set()
+        for page in query_features(url, where=where, fields=[COMMUNITY_NAME_FIELD], return_geometry=True):
+            for feature in page:
+                geometry = feature.get("geometry") or {}
+                attributes = {k.lower(): v for k, v in feature.get("attributes", {}).items()}
+                name = attributes.get(COMMUNITY_NAME_FIELD)
+                if name is None or geometry.get("x") is None:
+                    continue
+
+                # The layer may list a community once per project
+                key = (name, round(geometry["x"], 6), round(geometry["y"], 6))
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                names.append(name)
+                xs.append(geometry["x"])
+                ys.append(geometry["y"])
+
+        return cls(np.array(names, dtype=object), shapely.points(np.column_stack([xs, ys])) if xs
+                   else np.empty(0, dtype=object))
+
+    def __len__(self):
+        return len(self.names)
+
+    def within(self, geometries, miles: float) -> pd.DataFrame:
+        """
+        All (geometry, community) pairs within `miles`, ranked by distance
+        per geometry. geometries are shapely objects in WGS84.
+
+        Columns: geometry_index, community, distance_mi, rank
+        """
+        columns = ["geometry_index", "community", "distance_mi", "rank"]
+        geometries = np.asarray(geometries, dtype=object)
+        if len(self) == 0 or len(geometries) == 0:
+            return pd.DataFrame(columns=columns)
+
+        projected = reproject(geometries, STORAGE_WKID, WORK_EPSG)
+        radius = miles * METERS_PER_MILE
+
+        geom_idx, comm_idx = self.tree.query(projected, predicate="dwithin", distance=radius)
+        if len(geom_idx) == 0:
+            return pd.DataFrame(columns=columns)
+
+        distances = shapely.distance(projected[geom_idx], self.points[comm_idx]) / METERS_PER_MILE
+        result = pd.DataFrame({
+            "geometry_index": geom_idx,
+            "community": self.names[comm_idx],
+            "distance_mi": distances,
+        }).sort_values(["geometry_index", "distance_mi"], kind="stable")
+
+        result["rank"] = result.groupby("geometry_index").cumcount() + 1
+        return result.reset_index(drop=True)
+
+    def nearest_to_any(self, geometries, miles: float) -> pd.DataFrame:
+        """Each community once, with its distance to the closest input geometry."""
+        pairs = self.within(geometries, miles)
+        if pairs.empty:
+            return pd.DataFrame(columns=["community", "distance_mi"])
+        return (pairs.groupby("community", as_index=False)["distance_mi"].min()
+                .sort_values("distance_mi").reset_index(drop=True))
+
+
+@st.cache_resource(show_spinner="Loading communities...")
+def get_community_index(url: str) -> CommunityIndex:
+    return CommunityIndex.from_layer(url)
+
+
+
+# ---------------------------------------------------------
+# Project geometries (sites + routes)
+# ---------------------------------------------------------
+@st.cache_data(ttl=10 * 60, show_spinner=False)
+def project_geometries(urls: tuple, guid: str) -> list:
+    """GeoJSON geometries of every site and route belonging to a project."""
+    geometries = []
+    for url in urls:
+        for page in query_features(url, where=eq(PARENT_FIELD, guid), fields="OBJECTID",
+                                   return_geometry=True):
+            geometries.extend(
+                g for g in (esri_to_geojson(f.get("geometry")) for f in page) if g
+            )
+    return geometries
+
+
+
+# ---------------------------------------------------------
+# Communities tab
+# ---------------------------------------------------------
+def communities_tab():
+
+    st.write('')
+    st.markdown("<h4>IMPACTED COMMUNITIES 🏘️</h4>", unsafe_allow_html=True)
+
+    radius = st.slider("Distance (miles)", 1, 100, DEFAULT_RADIUS_MI, key="communities_radius")
+
+    try:
+        index = get_community_index(st.session_state["impact_comms_url"])
+        geojson = project_geometries(
+            (st.session_state["sites_url"], st.session_state["routes_url"]),
+            st.session_state["guid"]
+        )
+    except Exception as e:
+        st.error(f"Failed to load communities: {e}")
+        return
+
+    if not geojson:
+        st.info("This project has no sites or routes yet.")
+        return
+
+    nearby = index.nearest_to_any([shape(g) for g in geojson], radius)
+    if nearby.empty:
+        st.info(f"No communities within {radius} miles.")
+        return
+
+    st.dataframe(
+        nearby.rename(columns={"community": "Community", "distance_mi": "Distance (mi)"}),
+        hide_index=True,
+        use_container_width=True,
+        column_config={"Distance (mi)": st.column_config.NumberColumn(format="%.2f")}
+    )
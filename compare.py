@@ -0,0 +1,79 @@
+import pandas as pd
+import streamlit as st
+
+from agol_util import get_records
+from layer_schema import get_layer_schema, to_date, DATE_TYPES
+from prefetch import RECORD_MAX_AGE
+
+
+# Most projects a single comparison will load
+MAX_COMPARE = 50
+
+# Field → row label, in display order
+COMPARE_FIELDS = {
+    "phase": "Phase",
+    "construction_year": "Construction Year",
+    "iris": "IRIS",
+    "stip": "STIP",
+    "fed_proj_num": "Federal #",
+    "fund_type": "Funding Type",
+    "proj_prac": "Practice",
+    "anticipated_start": "Anticipated Start",
+    "anticipated_end": "Anticipated End",
+    "awarded_amount": "Awarded",
+    "current_contract_amount": "Current Contract",
+    "amount_paid_to_date": "Paid to Date",
+}
+
+
+
+# ---------------------------------------------------------
+# Comparison table
+# ---------------------------------------------------------
+def compare_frame(records: dict, names: dict, schema=None) -> pd.DataFrame:
+    """One row per field, one column per project (display values)."""
+    columns = {}
+    for guid, record in records.items():
+        values = []
+        for field in COMPARE_FIELDS:
+            value = record.get(field)
+            info = schema.field(field) if schema else None
+            if info and info.domain:
+                value = info.domain.get(value, value)
+            elif info and info.type in DATE_TYPES:
+                value = to_date(value)
+            values.append(value)
+        columns[names.get(guid, guid)] = values
+
+    return pd.DataFrame(columns, index=list(COMPARE_FIELDS.values()))
+
+
+def compare_view(label_to_gid: dict):
+    """Side-by-side view of several projects, loaded with one batch query."""
+    url = st.session_state["projects_url"]
+
+    st.markdown("<h4>COMPARE PROJECTS 🔍</h4>", unsafe_allow_html=True)
+
+    selected = st.multiselect(
+        "Projects to compare",
+        sorted(label_to_gid),
+        max_selections=MAX_COMPARE,
+        key="compare_projects"
+    )
+    if len(selected) < 2:
+        st.caption("Select two or more projects.")
+        return
+
+    names = {label_to_gid[label]: label for label in selected}
+    try:
+        records = get_records(url, list(names), max_age=RECORD_MAX_AGE)
+    except Exception as e:
+        st.error(f"Failed to load projects: {e}")
+        return
+
+    frame = compare_frame(records, names, get_layer_schema(url))
+
+    if st.toggle("Only show differences", value=False, key="compare_differences"):
+        frame = frame[frame.astype(str).nunique(axis=1) > 1]
+
+    st.dataframe(frame, use_container_width=True)
@@ -0,0 +1,355 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import streamlit as st
+
+from agol_query import compare, eq
+from agol_util import AGOLDataLoader, format_guid, get_object_ids, query_features
+from change_log import get_change_log
+from layer_schema import get_layer_schema
+from notifications import notify
+
+
+logger = logging.getLogger("contacts")
+
+CONTACTS_PATH = os.path.join(".cache", "contacts.sqlite")
+
+# Fields on the contacts layer
+NAME_FIELD = "contact_name"
+EMAIL_FIELD = "contact_email"
+AGENCY_FIELD = "contact_agency"
+PHONE_FIELD = "contact_phone"
+ROLE_FIELD = "contact_role"
+PARENT_FIELD = "parentglobalid"
+
+CONTACT_FIELDS = [NAME_FIELD, EMAIL_FIELD, AGENCY_FIELD, PHONE_FIELD, ROLE_FIELD]
+
+# Refresh from AGOL at most this often per process
+REFRESH_INTERVAL = 5 * 60
+
+SEARCH_LIMIT = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    objectid    INTEGER PRIMARY KEY,
+    project     TEXT,
+    name        TEXT,
+    email       TEXT,
+    agency      TEXT,
+    phone       TEXT,
+    role        TEXT,
+    edit_date   INTEGER
+);
+CREATE INDEX IF NOT EXISTS contacts_project ON contacts (project);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+    name, email, agency, content='contacts', content_rowid='objectid',
+    tokenize="unicode61 tokenchars '@.-_'"
+);
+
+CREATE TRIGGER IF NOT EXISTS contacts_ai AFTER INSERT ON contacts BEGIN
+    INSERT INTO contacts_fts(rowid, name, email, agency) VALUES (new.objectid, new.name, new.email, new.agency);
+END;
+CREATE TRIGGER IF NOT EXISTS contacts_ad AFTER DELETE ON contacts BEGIN
+    INSERT INTO contacts_fts(contacts_fts, rowid, name, email, agency)
+    VALUES ('delete', old.objectid, old.name, old.email, old.agency);
+END;
+CREATE TRIGGER IF NOT EXISTS contacts_au AFTER UPDATE ON contacts BEGIN
+    INSERT INTO contacts_fts(contacts_fts, rowid, name, email, agency)
+    VALUES ('delete', old.objectid, old.name, old.email, old.agency);
+    INSERT INTO contacts_fts(rowid, name, email, agency) VALUES (new.objectid, new.name, new.email, new.agency);
+END;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    url             TEXT PRIMARY KEY,
+    edit_watermark  INTEGER,
+    synced_at       REAL
+);
+"""
+
+
+
+def upsert_contacts(conn, rows: list):
+    """
+    Insert or update contact rows in place. An upsert fires the update
+    trigger, so the FTS index drops the old name/email/agency terms;
+    INSERT OR REPLACE would leave them behind.
+    """
+    conn.executemany(
+        """
+        INSERT INTO contacts (objectid, project, name, email, agency, phone, role, edit_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (objectid) DO UPDATE SET
+            project = excluded.project, name = excluded.name, email = excluded.email,
+            agency = excluded.agency, phone = excluded.phone, role = excluded.role,
+            edit_date = excluded.edit_date
+        """,
+        rows
+    )
+
+
+def contact_label(contact: dict) -> str:
+    return " · ".join(str(v) for v in (contact["name"], contact["role"], contact["agency"], contact["email"]) if v)
+
+
+def fts_query(text: str) -> str:
+    """User text → FTS5 prefix query; every term must match."""
+    terms = re.findall(r"[\w@.\-]+", text.lower())
+    return " AND ".join('"' + t.replace('"', '""') + '"*' for t in terms)
+
+
+
+# ---------------------------------------------------------
+# Local full-text index of the contacts layer
+# ---------------------------------------------------------
+class ContactIndex:
+    """
+    SQLite copy of the contacts layer with an FTS5 index over name,
+    email and agency. Searches never touch AGOL; refresh() pulls only
+    rows edited since the last sync plus the OBJECTIDs of deletions.
+    """
+
+    def __init__(self, url: str, path: str = CONTACTS_PATH):
+        self.url = url
+        self.path = path
+        self._refresh_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ---------------------------------------------------------
+    # Sync
+    # ---------------------------------------------------------
+    def _rows(self, features: list, edit_field: str) -> list:
+        rows = []
+        for feature in features:
+            a = {k.lower(): v for k, v in feature.get("attributes", {}).items()}
+            rows.append((
+                a.get("objectid"),
+                format_guid(a.get(PARENT_FIELD)),
+                a.get(NAME_FIELD),
+                a.get(EMAIL_FIELD),
+                a.get(AGENCY_FIELD),
+                a.get(PHONE_FIELD),
+                a.get(ROLE_FIELD),
+                a.get(edit_field.lower()) if edit_field else None
+            ))
+        return rows
+
+    def refresh(self, force: bool = False) -> dict:
+        """
+        Incremental refresh: edited rows since the watermark, then a
+        returnIdsOnly diff for deletions. The first run loads everything.
+        """
+        with self._refresh_lock:
+            with self._connect() as conn:
+                state = conn.execute("SELECT * FROM sync_state WHERE url = ?", (self.url,)).fetchone()
+
+            if state and not force and time.time() - state["synced_at"] < REFRESH_INTERVAL:
+                return {"upserts": 0, "deletes": 0, "skipped": True}
+
+            schema = get_layer_schema(self.url)
+            edit_field = schema.edit_date_field if schema else None
+            watermark = state["edit_watermark"] if state and not force else None
+
+            where = "1=1"
+            if watermark and edit_field:
+                where = compare(edit_field, ">", datetime.fromtimestamp(watermark / 1000, tz=timezone.utc))
+
+            fields = ["OBJECTID", PARENT_FIELD, *CONTACT_FIELDS] + ([edit_field] if edit_field else [])
+            upserts = 0
+            with self._connect() as conn:
+                if force:
+                    conn.execute("DELETE FROM contacts")
+                for page in query_features(self.url, where=where, fields=fields):
+                    rows = self._rows(page, edit_field)
+                    upsert_contacts(conn, rows)
+                    upserts += len(rows)
+
+                # Deletions don't show up in an edit-date query
+                server_ids = set(get_object_ids(self.url))
+                local_ids = {r[0] for r in conn.execute("SELECT objectid FROM contacts")}
+                gone = [(oid,) for oid in local_ids - server_ids]
+                conn.executemany("DELETE FROM contacts WHERE objectid = ?", gone)
+
+                new_watermark = conn.execute("SELECT MAX(edit_date) FROM contacts").fetchone()[0]
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+                    (self.url, new_watermark, time.time())
+                )
+
+            return {"upserts": upserts, "deletes": len(gone), "skipped": False}
+
+    # ---------------------------------------------------------
+    # Queries (local only)
+    # ---------------------------------------------------------
+    def search(self, text: str, limit: int = SEARCH_LIMIT) -> list:
+        """
+        Distinct people matching every term (prefix match on name, email
+        or agency), best match first, with the projects they are on.
+        """
+        query = fts_query(text)
+        if not query:
+            return []
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                WITH hits AS (
+                    SELECT rowid, rank FROM contacts_fts WHERE contacts_fts MATCH ?
+                )
+                SELECT c.name, c.email, c.agency, c.phone,
+                       COUNT(DISTINCT c.project) AS projects,
+                       GROUP_CONCAT(DISTINCT c.project) AS project_ids,
+                       MIN(hits.rank) AS score
+                FROM hits
+                JOIN contacts c ON c.objectid = hits.rowid
+                GROUP BY LOWER(COALESCE(c.email, c.name))
+                ORDER BY score
+                LIMIT ?
+                """,
+                (query, limit)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def project_contacts(self, guid: str) -> list:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT objectid, name, email, agency, phone, role FROM contacts WHERE project = ? ORDER BY name",
+                (format_guid(guid),)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    # ---------------------------------------------------------
+    # Edits (one batched applyEdits, then a local refresh)
+    # ---------------------------------------------------------
+    def attach_detach(self, guid: str, attach: list = None, detach: list = None) -> dict:
+        """
+        attach: contact dicts (name, email, agency, phone, role) to link to
+        the project; detach: OBJECTIDs of the project's contact rows.
+        """
+        adds = [{
+            "attributes": {
+                PARENT_FIELD: format_guid(guid),
+                NAME_FIELD: c.get("name"),
+                EMAIL_FIELD: c.get("email"),
+                AGENCY_FIELD: c.get("agency"),
+                PHONE_FIELD: c.get("phone"),
+                ROLE_FIELD: c.get("role"),
+            }
+        } for c in attach or []]
+
+        before = {c["objectid"]: c for c in self.project_contacts(guid)}
+        result = AGOLDataLoader(self.url).apply_edits(adds=adds, deletes=list(detach or []))
+
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM contacts WHERE objectid = ?", [(oid,) for oid in result["deleted"]])
+
+        # Re-index the project right away: new rows get their OBJECTIDs and
+        # detached rows leave the index
+        if adds or result["deleted"]:
+            self.refresh_project(guid)
+            self._log_changes(guid, before, result)
+        return result
+
+    def _log_changes(self, guid: str, before: dict, result: dict):
+        """One change-log row per contact detached from or attached to the project."""
+        after = {c["objectid"]: c for c in self.project_contacts(guid)}
+        rows = [(guid, "contacts", "contact", contact_label(before[oid]), None)
+                for oid in result["deleted"] if oid in before]
+        rows += [(guid, "contacts", "contact", None, contact_label(after[oid]))
+                 for oid in after.keys() - before.keys()]
+        try:
+            get_change_log().record_many(rows)
+        except Exception as e:
+            logger.warning("Contact changes for %s were not logged: %s", guid, e)
+
+    def refresh_project(self, guid: str):
+        schema = get_layer_schema(self.url)
+        edit_field = schema.edit_date_field if schema else None
+        fields = ["OBJECTID", PARENT_FIELD, *CONTACT_FIELDS] + ([edit_field] if edit_field else [])
+        with self._connect() as conn:
+            conn.execute("DELETE FROM contacts WHERE project = ?", (format_guid(guid),))
+            for page in query_features(self.url, where=eq(PARENT_FIELD, guid), fields=fields):
+                upsert_contacts(conn, self._rows(page, edit_field))
+
+
+@st.cache_resource
+def get_contact_index(url: str) -> ContactIndex:
+    return ContactIndex(url)
+
+
+
+# ---------------------------------------------------------
+# Contacts tab
+# ---------------------------------------------------------
+def contacts_tab():
+
+    st.write('')
+    st.markdown("<h4>PROJECT CONTACTS 👥</h4>", unsafe_allow_html=True)
+
+    guid = st.session_state["guid"]
+    try:
+        index = get_contact_index(st.session_state["contacts_url"])
+        index.refresh()
+    except Exception as e:
+        st.error(f"Failed to load contacts: {e}")
+        return
+
+    # Contacts on this project (detach)
+    current = index.project_contacts(guid)
+    if current:
+        detach = []
+        for contact in current:
+            if st.checkbox(contact_label(contact), key=f"contacts_detach_{contact['objectid']}"):
+                detach.append(contact["objectid"])
+        if detach and st.button(f"Remove {len(detach)} contact(s)", key="contacts_detach"):
+            result = index.attach_detach(guid, detach=detach)
+            notify(result["message"], "success" if result["success"] else "error", defer=True)
+            st.rerun()
+    else:
+        st.info("No contacts on this project yet.")
+
+    # Directory search across all projects (attach)
+    st.write("")
+    text = st.text_input("Search contacts by name, email or agency", key="contacts_search")
+    if not text:
+        return
+
+    matches = index.search(text)
+    if not matches:
+        st.caption("No matching contacts.")
+        return
+
+    attach = []
+    for i, match in enumerate(matches):
+        label = " · ".join(str(v) for v in (match["name"], match["agency"], match["email"]) if v)
+        if st.checkbox(f"{label} ({match['projects']} project(s))", key=f"contacts_attach_{i}_{match['email']}"):
+            attach.append(match)
+
+    role = st.text_input("Role on this project", key="contacts_role")
+    if attach and st.button(f"Add {len(attach)} contact(s)", key="contacts_attach"):
+        result = index.attach_detach(guid, attach=[{**m, "role": role or None} for m in attach])
+        notify(result["message"], "success" if result["success"] else "error", defer=True)
+        st.rerun()
@@ -0,0 +1,117 @@
+import pandas as pd
+import streamlit as st
+
+from agol_util import get_field_statistics
+
+
+# Aggregates are cheap for AGOL but still a round trip; share them briefly
+STATISTICS_TTL = 10 * 60
+
+# Dimension label → field on the projects layer
+GROUP_FIELDS = {
+    "Phase": "phase",
+    "Practice": "proj_prac",
+    "Funding Type": "fund_type",
+    "Fiscal Year": "award_fiscal_year",
+}
+
+# Output column → (statistic, field)
+PORTFOLIO_STATISTICS = {
+    "projects": ("count", "objectid"),
+    "awarded_amount": ("sum", "awarded_amount"),
+    "current_contract_amount": ("sum", "current_contract_amount"),
+    "amount_paid_to_date": ("sum", "amount_paid_to_date"),
+}
+
+AMOUNT_COLUMNS = ["awarded_amount", "current_contract_amount", "amount_paid_to_date"]
+
+
+
+# ---------------------------------------------------------
+# Cached statistics API
+# ---------------------------------------------------------
+def _out_statistics() -> list:
+    return [
+        {"statisticType": stat, "onStatisticField": field, "outStatisticFieldName": name}
+        for name, (stat, field) in PORTFOLIO_STATISTICS.items()
+    ]
+
+
+@st.cache_data(ttl=STATISTICS_TTL, show_spinner=False)
+def portfolio_statistics(url: str, group_field: str = None, where: str = "1=1") -> pd.DataFrame:
+    """
+    Counts and funding totals for the portfolio, grouped by one field
+    (or a single totals row when group_field is None). Only the aggregate
+    rows leave the server.
+    """
+    rows = get_field_statistics(
+        url,
+        statistics=_out_statistics(),
+        group_by=[group_field] if group_field else None,
+        where=where
+    )
+
+    # AGOL may echo field names in a different case
+    df = pd.DataFrame(rows).rename(columns=str.lower)
+    for column in PORTFOLIO_STATISTICS:
+        if column not in df.columns:
+            df[column] = 0
+
+    df[list(PORTFOLIO_STATISTICS)] = df[list(PORTFOLIO_STATISTICS)].fillna(0)
+    if group_field:
+        group_field = group_field.lower()
+        df[group_field] = df[group_field].fillna("(blank)").astype(str)
+        df = df.sort_values(group_field).reset_index(drop=True)
+
+    return df
+
+
+
+# ---------------------------------------------------------
+# Portfolio dashboard
+# ---------------------------------------------------------
+def portfolio_dashboard():
+    url = st.session_state["projects_url"]
+
+    st.markdown("<h4>PORTFOLIO OVERVIEW 📊</h4>", unsafe_allow_html=True)
+
+    try:
+        totals = portfolio_statistics(url)
+    except Exception as e:
+        st.error(f"Failed to load portfolio statistics: {e}")
+        return
+
+    if totals.empty:
+        st.info("No projects found.")
+        return
+
+    row = totals.iloc[0]
+    cols = st.columns(4)
+    cols[0].metric("Projects", f"{int(row['projects']):,}")
+    cols[1].metric("Awarded", f"${row['awarded_amount']:,.0f}")
+    cols[2].metric("Current Contract", f"${row['current_contract_amount']:,.0f}")
+    cols[3].metric("Paid to Date", f"${row['amount_paid_to_date']:,.0f}")
+
+    label = st.radio("Group by", list(GROUP_FIELDS), horizontal=True, key="dashboard_group_by")
+    group_field = GROUP_FIELDS[label].lower()
+
+    try:
+        grouped = portfolio_statistics(url, group_field)
+    except Exception as e:
+        st.error(f"Failed to load statistics by {label.lower()}: {e}")
+        return
+
+    chart = grouped.set_index(group_field)
+    st.bar_chart(chart[AMOUNT_COLUMNS])
+
+    st.dataframe(
+        grouped.rename(columns={group_field: label}),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "projects": st.column_config.NumberColumn("Projects", format="%d"),
+            "awarded_amount": st.column_config.NumberColumn("Awarded", format="$%.0f"),
+            "current_contract_amount": st.column_config.NumberColumn("Current Contract", format="$%.0f"),
+            "amount_paid_to_date": st.column_config.NumberColumn("Paid to Date", format="$%.0f"),
+        }
+    )
@@ -0,0 +1,80 @@
+import streamlit as st
+
+from agol_util import single_flight
+from startup_metrics import startup_report
+
+
+# Keys whose values are never shown in the inspector
+REDACTED_KEYS = {"AGOL_USERNAME", "AGOL_PASSWORD"}
+REDACTED_MARKERS = ("password", "token", "secret")
+
+PAGE_SIZE = 25
+
+
+
+def debug_enabled() -> bool:
+    """The inspector is off unless ?debug=true is set or debug_mode is on."""
+    if st.session_state.get("debug_mode"):
+        return True
+    return str(st.query_params.get("debug", "")).lower() in ("1", "true", "yes")
+
+
+def _is_redacted(key) -> bool:
+    key = str(key)
+    return key in REDACTED_KEYS or any(m in key.lower() for m in REDACTED_MARKERS)
+
+
+def _preview(value, limit: int = 200) -> str:
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + " …"
+
+
+
+# ---------------------------------------------------------
+# Session state inspector
+# ---------------------------------------------------------
+def debug_inspector(key: str = "debug_inspector"):
+    """
+    Paginated, filterable view of st.session_state.
+
+    Nothing is serialized unless debug mode is enabled and the inspector
+    has been opened, so the normal render path pays no cost.
+    """
+    if not debug_enabled():
+        return
+
+    if not st.toggle("Open session inspector", value=False, key=f"{key}_open"):
+        return
+
+    with st.container(border=True):
+        col_filter, col_size = st.columns([4, 1])
+        query = col_filter.text_input("Filter keys", key=f"{key}_filter").strip().lower()
+        page_size = col_size.number_input(
+            "Per page", min_value=5, max_value=200, value=PAGE_SIZE, step=5, key=f"{key}_size"
+        )
+
+        keys = sorted(str(k) for k in st.session_state.keys())
+        if query:
+            keys = [k for k in keys if query in k.lower()]
+
+        total_pages = max(1, -(-len(keys) // int(page_size)))
+        page = st.selectbox(f"Page (of {total_pages})", range(1, total_pages + 1), index=0)
+
+        start = (int(page) - 1) * int(page_size)
+        rows = []
+        for k in keys[start:start + int(page_size)]:
+            value = st.session_state.get(k)
+            rows.append({
+                "key": k,
+                "type": type(value).__name__,
+                "value": "••••••" if _is_redacted(k) else _preview(value)
+            })
+
+        st.caption(f"{len(keys)} matching key(s)")
+        st.table(rows)
+
+        with st.expander("Startup metrics"):
+            st.json({"first_paint_ms": st.session_state.get("first_paint_ms"), **startup_report()})
+
+        with st.expander("Request coalescing"):
+            st.json(single_flight.stats())
@@ -0,0 +1,75 @@
+from typing import Optional
+
+
+
+def _signed_area(ring: list) -> float:
+    """Shoelace area; negative for clockwise rings."""
+    return sum(
+        x1 * y2 - x2 * y1
+        for (x1, y1, *_), (x2, y2, *_) in zip(ring, ring[1:])
+    ) / 2
+
+
+
+# ---------------------------------------------------------
+# Esri JSON ↔ GeoJSON geometry conversion
+# ---------------------------------------------------------
+def esri_to_geojson(geometry: Optional[dict]) -> Optional[dict]:
+    """Convert an Esri JSON geometry (point, multipoint, polyline, polygon) to GeoJSON."""
+    if not geometry:
+        return None
+
+    if "x" in geometry and "y" in geometry:
+        if geometry["x"] is None or geometry["y"] is None:
+            return None
+        return {"type": "Point", "coordinates": [geometry["x"], geometry["y"]]}
+
+    if "points" in geometry:
+        return {"type": "MultiPoint", "coordinates": geometry["points"]}
+
+    if "paths" in geometry:
+        paths = geometry["paths"]
+        if len(paths) == 1:
+            return {"type": "LineString", "coordinates": paths[0]}
+        return {"type": "MultiLineString", "coordinates": paths}
+
+    if "rings" in geometry:
+        # Esri lists every ring together: clockwise rings are exteriors and
+        # counter-clockwise rings are holes of the preceding exterior
+        polygons = []
+        for ring in geometry["rings"]:
+            if _signed_area(ring) <= 0 or not polygons:
+                polygons.append([ring])
+            else:
+                polygons[-1].append(ring)
+
+        if len(polygons) == 1:
+            return {"type": "Polygon", "coordinates": polygons[0]}
+        return {"type": "MultiPolygon", "coordinates": polygons}
+
+    return None
+
+
+def geojson_to_esri(geometry: Optional[dict], wkid: int = 4326) -> Optional[dict]:
+    """Convert a GeoJSON geometry to Esri JSON for applyEdits."""
+    if not geometry:
+        return None
+
+    kind = geometry.get("type")
+    coords = geometry.get("coordinates")
+    sr = {"spatialReference": {"wkid": wkid}}
+
+    if kind == "Point":
+        return {"x": coords[0], "y": coords[1], **sr}
+    if kind == "MultiPoint":
+        return {"points": coords, **sr}
+    if kind == "LineString":
+        return {"paths": [coords], **sr}
+    if kind == "MultiLineString":
+        return {"paths": coords, **sr}
+    if kind == "Polygon":
+        return {"rings": coords, **sr}
+    if kind == "MultiPolygon":
+        return {"rings": [ring for polygon in coords for ring in polygon], **sr}
+
+    raise ValueError(f"Unsupported GeoJSON geometry type: {kind}")
@@ -1,14 +1,8 @@
 import streamlit as st
-from agol_util import select_record
+from map_view import render_project_map
 
 
 def geometry_tab():
 
-    record = select_record(url = st.session_state['projects_url'], 
-                id_field = 'globalid', 
-                id_value = st.session_state['guid'], 
-                fields = "*", 
-                return_geometry = True)
-
-
-    st.markdown(record)
\ No newline at end of file
+    render_project_map(url = st.session_state['projects_url'],
+                       guid = st.session_state['guid'])
@@ -0,0 +1,176 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import shapely
+from pyproj import Transformer
+
+
+# Geometries are stored in WGS84; measurements are done in Alaska Albers
+STORAGE_WKID = 4326
+WORK_EPSG = 3338
+
+METERS_PER_MILE = 1609.344
+
+MIN_VERTICES = {"point": 1, "line": 2}
+
+
+
+@dataclass
+class GeometryBatch:
+    """Result of a pipeline run; arrays are aligned with the input features."""
+    kind: str
+    geometries: np.ndarray                 # shapely geometries in WGS84 (None when invalid)
+    valid: np.ndarray                      # bool mask
+    lengths_mi: np.ndarray                 # 0 for points / invalid features
+    errors: dict = field(default_factory=dict)   # feature index → message
+
+    def apply_edits(self, attributes: list = None) -> list:
+        """applyEdits-ready feature JSON for every valid geometry."""
+        return to_esri_features(self.geometries[self.valid], self.kind,
+                                [attributes[i] for i in np.flatnonzero(self.valid)] if attributes else None)
+
+
+
+# ---------------------------------------------------------
+# Array construction
+# ---------------------------------------------------------
+def flatten_coordinates(features: list, swap_latlon: bool = False):
+    """
+    [[x, y] or [[x, y], ...], ...] → (coords (n, 2), feature index (n,)).
+    swap_latlon flips [lat, lon] input into [lon, lat] for the whole batch at once.
+    """
+    counts = np.empty(len(features), dtype=np.int64)
+    parts = []
+    for i, coords in enumerate(features):
+        arr = np.asarray(coords, dtype=float).reshape(-1, 2) if len(coords) else np.empty((0, 2))
+        counts[i] = len(arr)
+        parts.append(arr)
+
+    coords = np.concatenate(parts) if parts else np.empty((0, 2))
+    if swap_latlon:
+        coords = coords[:, ::-1]
+    index = np.repeat(np.arange(len(features)), counts)
+    return np.ascontiguousarray(coords), index, counts
+
+
+def _transformer(src: int, dst: int) -> Transformer:
+    return Transformer.from_crs(src, dst, always_xy=True)
+
+
+def reproject(geometries: np.ndarray, src: int, dst: int) -> np.ndarray:
+    """Reproject a whole array of geometries with one vectorized transform."""
+    transformer = _transformer(src, dst)
+    return shapely.transform(
+        geometries,
+        lambda xy: np.column_stack(transformer.transform(xy[:, 0], xy[:, 1]))
+    )
+
+
+
+# ---------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------
+class GeometryPipeline:
+    """
+    Validate, densify, measure and serialize batches of site (point) or
+    route (line) geometries. Every step operates on whole arrays.
+    """
+
+    def __init__(self, kind: str, densify_m: float = None, swap_latlon: bool = False,
+                 work_epsg: int = WORK_EPSG):
+        if kind not in MIN_VERTICES:
+            raise ValueError(f"Unsupported geometry kind: {kind}")
+        self.kind = kind
+        self.densify_m = densify_m
+        self.swap_latlon = swap_latlon
+        self.work_epsg = work_epsg
+
+    def _validate(self, coords, index, counts) -> dict:
+        errors = {}
+
+        for i in np.flatnonzero(counts < MIN_VERTICES[self.kind]):
+            errors[int(i)] = f"needs at least {MIN_VERTICES[self.kind]} vertex(es), got {int(counts[i])}"
+
+        if self.kind == "point":
+            for i in np.flatnonzero(counts > 1):
+                errors[int(i)] = f"a point takes one coordinate pair, got {int(counts[i])}"
+
+        bad = ~np.isfinite(coords).all(axis=1)
+        bad |= (np.abs(coords[:, 0]) > 180) | (np.abs(coords[:, 1]) > 90)
+        for i in np.unique(index[bad]):
+            errors.setdefault(int(i), "coordinates outside WGS84 bounds or not numeric")
+
+        return errors
+
+    def run(self, features: list) -> GeometryBatch:
+        coords, index, counts = flatten_coordinates(features, self.swap_latlon)
+        errors = self._validate(coords, index, counts)
+
+        n = len(features)
+        valid = np.ones(n, dtype=bool)
+        valid[list(errors)] = False
+        keep = valid[index] if len(index) else np.empty(0, dtype=bool)
+
+        geometries = np.full(n, None, dtype=object)
+        lengths = np.zeros(n)
+        if not valid.any():
+            return GeometryBatch(self.kind, geometries, valid, lengths, errors)
+
+        # Build all geometries in one call
+        good_ids = np.flatnonzero(valid)
+        if self.kind == "point":
+            built = shapely.points(coords[keep])
+        else:
+            remap = np.searchsorted(good_ids, index[keep])
+            built = shapely.linestrings(coords[keep], indices=remap)
+
+            # Drop consecutive duplicate vertices before topology checks
+            built = shapely.remove_repeated_points(built)
+
+            simple = shapely.is_simple(built)
+            for pos in np.flatnonzero(~simple):
+                errors[int(good_ids[pos])] = "line self-intersects"
+
+            # Empty or zero-length lines can't be segmentized or measured
+            short = (shapely.get_num_coordinates(built) < 2) | shapely.is_empty(built) \
+                | (shapely.length(built) == 0)
+            for pos in np.flatnonzero(short):
+                errors[int(good_ids[pos])] = "line collapses to a single point"
+
+            # Only valid lines go on to be segmentized
+            ok = simple & ~short
+            built, good_ids = built[ok], good_ids[ok]
+            valid[:] = False
+            valid[good_ids] = True
+
+        if self.kind == "line" and len(built):
+            projected = reproject(built, STORAGE_WKID, self.work_epsg)
+            if self.densify_m:
+                projected = shapely.segmentize(projected, self.densify_m)
+                built = reproject(projected, self.work_epsg, STORAGE_WKID)
+            lengths[good_ids] = shapely.length(projected) / METERS_PER_MILE
+
+        geometries[good_ids] = built
+        return GeometryBatch(self.kind, geometries, valid, lengths, errors)
+
+
+
+# ---------------------------------------------------------
+# Serialization
+# ---------------------------------------------------------
+def to_esri_features(geometries: np.ndarray, kind: str, attributes: list = None,
+                     wkid: int = STORAGE_WKID) -> list:
+    """applyEdits feature JSON for an array of point or line geometries."""
+    if len(geometries) == 0:
+        return []
+
+    sr = {"wkid": wkid}
+    coords, index = shapely.get_coordinates(geometries, return_index=True)
+    if kind == "point":
+        esri = [{"x": float(x), "y": float(y), "spatialReference": sr} for x, y in coords]
+    else:
+        splits = np.flatnonzero(np.diff(index)) + 1
+        esri = [{"paths": [part.tolist()], "spatialReference": sr} for part in np.split(coords, splits)]
+
+    attributes = attributes or [{} for _ in esri]
+    return [{"geometry": g, "attributes": a} for g, a in zip(esri, attributes)]
@@ -1,6 +1,12 @@
 import streamlit as st
-import time
-from agol_util import select_record, AGOLRecordLoader, AGOLDataLoader
+from agol_util import refresh_record_fields, AGOLRecordLoader, AGOLDataLoader
+from record_store import get_field_value, session_record
+from startup_metrics import lazy_import
+from prefetch import RECORD_MAX_AGE
+from layer_schema import get_layer_schema, coerce_record, to_date
+from value_lists import value_list
+from notifications import notify
+from debug_inspector import debug_inspector
 
 
 # ---------------------------------------------------------
@@ -12,36 +18,61 @@ def update_section_to_agol(prefix, section, rows):
     for row in rows:
         for field in row:
             field_name = field["name"]
-            key = f"{prefix}_{field_name}"
-            attributes[field_name] = st.session_state.get(key, None)
+            attributes[field_name] = get_field_value(prefix, field_name)
 
-    objectid_key = f"{prefix}_objectid"
-    attributes["OBJECTID"] = st.session_state.get(objectid_key)
+    attributes["OBJECTID"] = get_field_value(prefix, "objectid")
+
+    # Dates → epoch-ms, numerics → numbers, domain names → codes
+    schema = get_layer_schema(st.session_state["projects_url"])
+    attributes = coerce_record(attributes, schema, to_agol=True)
 
     payload = {"attributes": attributes}
-    st.session_state[f"{section}_last_payload"] = payload
+
+    # Values before the edit, for the change log
+    record = session_record(prefix)
+    previous = dict(record.attributes) if record is not None else {}
 
     loader = AGOLDataLoader(st.session_state["projects_url"])
     result = loader.update_features(payload)
 
-    st.session_state[f"{section}_agol_result"] = result
+    # Re-read just this card's fields into the shared record
+    if result.get("success"):
+        try:
+            # Imported on first save; it isn't needed to render the page
+            change_log = lazy_import("change_log")
+            change_log.get_change_log().record(
+                st.session_state["guid"], section, change_log.changed_fields(previous, attributes, schema)
+            )
+        except Exception as e:
+            notify(f"Saved, but the change could not be logged: {e}", "warning")
+        refresh_record_fields(st.session_state["projects_url"], st.session_state["guid"],
+                              [field["name"] for row in rows for field in row])
+
+    # Only the most recent update is kept for the session
+    st.session_state["last_update"] = {
+        "section": section,
+        "payload": payload,
+        "result": result
+    }
     return result
 
 
 
 # ---------------------------------------------------------
 # Render a section (always edit mode)
+#
+# Each card is a fragment: editing a field or clicking UPDATE reruns
+# only this card (and only its own AGOL calls), not the whole app.
 # ---------------------------------------------------------
+@st.fragment
 def render_section(section_name, data_prefix, widget_prefix, rows, on_save=None):
 
     # Always force edit mode
     edit_key = f"{widget_prefix}_edit_mode"
     st.session_state[edit_key] = True
 
-    # Keys for success/error messages
-    msg_key = f"{widget_prefix}_update_msg"
-    msg_type_key = f"{widget_prefix}_update_type"
-    msg_time_key = f"{widget_prefix}_update_time"
+    # Field types and domains come from the layer schema unless declared
+    schema = get_layer_schema(st.session_state["projects_url"])
 
     with st.expander(f"**{section_name}**", expanded=True):
 
@@ -56,8 +87,13 @@ def render_section(section_name, data_prefix, widget_prefix, rows, on_save=None)
                 data_key = f"{data_prefix}_{field_name}"
                 widget_key = f"{widget_prefix}_{field_name}"
 
-                # Pull current value safely
-                current_value = st.session_state.get(data_key, "")
+                # Pull current value safely (pending edit or shared record)
+                current_value = get_field_value(data_prefix, field_name, "")
+                field_info = schema.field(field_name) if schema else None
+
+                # Show coded-value domains by their display name
+                if field_info and field_info.domain:
+                    current_value = field_info.domain.get(current_value, current_value)
 
                 # Fix: ensure text_area receives a string, not None or NaN
                 if current_value is None:
@@ -65,7 +101,7 @@ def render_section(section_name, data_prefix, widget_prefix, rows, on_save=None)
                 else:
                     current_value = str(current_value)
 
-                field_type = field.get("type", "text")
+                field_type = field.get("type") or (field_info.widget_type if field_info else "text")
 
                 if field_type == "text":
                     col.text_input(label, value=current_value, key=widget_key)
@@ -80,7 +116,7 @@ def render_section(section_name, data_prefix, widget_prefix, rows, on_save=None)
                     )
 
                 elif field_type == "select":
-                    options = field.get("options", [])
+                    options = field.get("options") or (schema.options(field_name) if schema else [])
                     col.selectbox(
                         label,
                         options,
@@ -92,55 +128,21 @@ def render_section(section_name, data_prefix, widget_prefix, rows, on_save=None)
                     col.number_input(label, value=float(current_value) if current_value else 0, key=widget_key)
 
                 elif field_type == "date":
-                    col.date_input(label, value=current_value, key=widget_key)
+                    col.date_input(label, value=to_date(current_value), key=widget_key)
 
                 # Sync widget value back to real data key
                 st.session_state[data_key] = st.session_state.get(widget_key)
 
-        # UPDATE BUTTON + MESSAGE
-        col_btn, col_msg = st.columns([1, 6])
-
-        with col_btn:
-            if st.button("UPDATE", key=f"save_{widget_prefix}"):
+        # UPDATE BUTTON (result shown as a toast that expires in the browser)
+        if st.button("UPDATE", key=f"save_{widget_prefix}"):
 
-                result = on_save(data_prefix, section_name.lower(), rows)
-
-                # Correct success detection
-                if isinstance(result, dict) and result.get("success") is True:
-                    st.session_state[msg_key] = "success"
-                    st.session_state[msg_type_key] = "success"
-                else:
-                    st.session_state[msg_key] = f"{result}"
-                    st.session_state[msg_type_key] = "error"
-
-                st.session_state[msg_time_key] = time.time()
-                st.rerun()
-
-        # DISPLAY MESSAGE + AUTO-HIDE
-        with col_msg:
-            msg_type = st.session_state.get(msg_type_key)
-            msg = st.session_state.get(msg_key)
-            msg_time = st.session_state.get(msg_time_key)
-
-            if msg_type and msg_time:
-
-                # Auto-hide after 3 seconds
-                if time.time() - msg_time > 3:
-                    st.session_state[msg_key] = None
-                    st.session_state[msg_type_key] = None
-                    st.session_state[msg_time_key] = None
-                    st.rerun()
-
-                # SUCCESS → green checkmark only
-                if msg_type == "success":
-                    st.markdown(
-                        "<span style='font-size:24px; color:green;'>&#10004;</span>",
-                        unsafe_allow_html=True
-                    )
+            result = on_save(data_prefix, section_name.lower(), rows)
 
-                # ERROR → show full error message
-                elif msg_type == "error":
-                    st.error(f"Update failed: {msg}")
+            # Correct success detection
+            if isinstance(result, dict) and result.get("success") is True:
+                notify(f"{section_name} saved.", "success")
+            else:
+                notify(f"{section_name} update failed: {result}", "error")
 
 
 
@@ -151,30 +153,34 @@ def information_tab():
 
     # Load AGOL data only when not editing ANY information section
     if not any(k.endswith("information_edit_mode") and st.session_state[k] for k in st.session_state):
-        AGOLRecordLoader(
+        loader = AGOLRecordLoader(
             url=st.session_state["projects_url"],
             id_field="globalid",
             id_value=st.session_state["guid"],
             prefix="information",
             fields="*",
-            return_geometry=False
+            return_geometry=False,
+            max_age=RECORD_MAX_AGE
         )
+        if loader.stale:
+            st.warning("ArcGIS Online is not responding; showing the last saved copy of this project.")
 
-    st.markdown(st.session_state)
+    # Off by default; only serializes session_state when opened
+    debug_inspector()
 
     # IDENTIFICATION
     identification_rows = [
-        [{"name": "proj_name", "label": "Project Name", "type": "text"}],
+        [{"name": "proj_name", "label": "Project Name"}],
         [
             {"name": "construction_year", "label": "Construction Year", "type": "select",
-             "options": st.session_state['construction_years']},
+             "options": value_list("construction_years")},
             {"name": "phase", "label": "Phase", "type": "select",
-             "options": st.session_state['phase']}
+             "options": value_list("phase")}
         ],
         [
-            {"name": "iris", "label": "IRIS", "type": "text"},
-            {"name": "stip", "label": "STIP", "type": "text"},
-            {"name": "fed_proj_num", "label": "Federal #", "type": "text"}
+            {"name": "iris", "label": "IRIS"},
+            {"name": "stip", "label": "STIP"},
+            {"name": "fed_proj_num", "label": "Federal #"}
         ]
     ]
 
@@ -191,8 +197,8 @@ def information_tab():
     # TIMELINE
     timeline_rows = [
         [
-            {"name": "anticipated_start", "label": "Anticipated Start", "type": "text"},
-            {"name": "anticipated_end", "label": "Anticipated End", "type": "text"}
+            {"name": "anticipated_start", "label": "Anticipated Start", "type": "date"},
+            {"name": "anticipated_end", "label": "Anticipated End", "type": "date"}
         ]
     ]
 
@@ -210,9 +216,9 @@ def information_tab():
     funding_prac_rows = [
         [
             {"name": "fund_type", "label": "Funding Type", "type": "select",
-             "options": st.session_state['funding']},
+             "options": value_list("funding")},
             {"name": "proj_prac", "label": "Practice", "type": "select",
-             "options": st.session_state['practice']}
+             "options": value_list("practice")}
         ]
     ]
 
@@ -257,10 +263,10 @@ def information_tab():
     # WEB LINKS
     web_links_rows = [
         [
-            {"name": "proj_web", "label": "Project Website", "type": "text"}
+            {"name": "proj_web", "label": "Project Website"}
         ],
         [
-            {"name": "apex_mapper_link", "label": "APEX Mapper Link", "type": "text"}
+            {"name": "apex_mapper_link", "label": "APEX Mapper Link"}
         ]
     ]
 
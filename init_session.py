@@ -1,7 +1,31 @@
 import os
+from functools import lru_cache
+
 import streamlit as st
 
 
+# ---------------------------------------------------------
+# APEX URLS
+# ---------------------------------------------------------
+APEX_URLS = {
+    "projects_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/0",
+    "sites_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/1",
+    "routes_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/2",
+    "impact_comms_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/3",
+    "region_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/4",
+    "bor_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/5",
+    "senate_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/6",
+    "house_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/7",
+    "impact_routes_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/8",
+    "contacts_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/9",
+    "aashtoware_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/AWP_PROJECTS_EXPORT_XYTableToPoint_ExportFeatures/FeatureServer/0",
+    "mileposts": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/AKDOT_Routes_Mileposts/FeatureServer/0"
+}
+
+# The ten layers of the APEX feature service
+APEX_LAYERS = [key for key in APEX_URLS if key not in ("aashtoware_url", "mileposts")]
+
+
 
 def init_session_state():
     """Initialize all session state values."""
@@ -15,26 +39,13 @@ def init_session_state():
         "mode": 'centered',
         "counter": 0,
         "data_loaded": False,
+        "debug_mode": False,
+        "use_local_mirror": load_mirror_setting(),
     }
     for key, value in defaults.items():
         st.session_state.setdefault(key, value)
 
 
-    # ---------------------------------------------------------
-    # VALUES
-    # ---------------------------------------------------------
-
-    value_lists = {
-        'construction_years': ["CY2025", "CY2026", "CY2027", "CY2028", "CY2029", "CY2030"],
-        'phase': ["Planning", "Construction"],
-        'funding': ["FHWY", "FHWA", "FAA", "STATE", "OTHER"],
-        'practice': ['Highways', "Aviation", "Facilities", "Marine Highway", "Other"],
-        'fiscal_year': ["2020", "2021", "2022", "2023", "2024", "2025", "2026", "2027", "2028", "2029", "2030"]
-    }
-    for key, value in value_lists.items():
-        st.session_state.setdefault(key, value)
-
-
     # ---------------------------------------------------------
     # URL PARAMETERS
     # ---------------------------------------------------------
@@ -50,54 +61,42 @@ def init_session_state():
     # ---------------------------------------------------------
     # APEX URLS
     # ---------------------------------------------------------
-    apex_urls = {
-        "projects_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/0",
-        "sites_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/1",
-        "routes_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/2",
-        "impact_comms_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/3",
-        "region_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/4",
-        "bor_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/5",
-        "senate_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/6",
-        "house_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/7",
-        "impact_routes_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/8",
-        "contacts_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/service_0d036ae7c0a7424088ee565727d1bb66/FeatureServer/9",
-        "aashtoware_url": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/AWP_PROJECTS_EXPORT_XYTableToPoint_ExportFeatures/FeatureServer/0",
-        "mileposts": "https://services.arcgis.com/r4A0V7UzH9fcLVvv/arcgis/rest/services/AKDOT_Routes_Mileposts/FeatureServer/0"
-    }
-    for key, value in apex_urls.items():
+    for key, value in APEX_URLS.items():
         st.session_state.setdefault(key, value)
 
 
 
-    # ---------------------------------------------------------
-    # AGOL CREDENTIALS
-    # ---------------------------------------------------------
+@lru_cache(maxsize=1)
+def load_credentials() -> tuple:
+    """
+    AGOL username and password, read once per process:
+    a .env file when present, otherwise Streamlit secrets.
+    """
 
     # 1. Check if a .env file exists
-    env_file_exists = os.path.exists(".env")
-
-    env_user = None
-    env_pass = None
-
-    if env_file_exists:
+    if os.path.exists(".env"):
         from dotenv import load_dotenv
         load_dotenv()
-        agol_username = os.getenv("AGOL_USERNAME")
-        agol_password = os.getenv("AGOL_PASSWORD")
-
-    else:
-        # 2. Check secrets (may or may not exist)
-        agol_username = st.secrets.get("AGOL_USERNAME") if hasattr(st, "secrets") else None
-        agol_password = st.secrets.get("AGOL_PASSWORD") if hasattr(st, "secrets") else None
-
-
-    # 4. Store in session_state safely
-    st.session_state.setdefault("AGOL_USERNAME", agol_username)
-    st.session_state.setdefault("AGOL_PASSWORD", agol_password)
-
-
-
-# --------------------------------------------------------- 
-# RUN AUTOMATICALLY WHEN IMPORTED 
-# --------------------------------------------------------- 
-init_session_state()
+        return os.getenv("AGOL_USERNAME"), os.getenv("AGOL_PASSWORD")
+
+    # 2. Check secrets (may or may not exist)
+    try:
+        return st.secrets.get("AGOL_USERNAME"), st.secrets.get("AGOL_PASSWORD")
+    except Exception:
+        return None, None
+
+
+@lru_cache(maxsize=1)
+def load_mirror_setting() -> bool:
+    """
+    Whether sessions read from the local SQLite mirror: APEX_USE_LOCAL_MIRROR
+    from the environment (or .env), otherwise Streamlit secrets.
+    """
+    load_credentials()  # loads .env into the environment when present
+    value = os.getenv("APEX_USE_LOCAL_MIRROR")
+    if value is None:
+        try:
+            value = st.secrets.get("APEX_USE_LOCAL_MIRROR")
+        except Exception:
+            value = None
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,293 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from agol_util import get_layer_metadata
+
+
+logger = logging.getLogger("layer_schema")
+
+# Layer metadata is kept on disk so a restart doesn't refetch every schema
+SCHEMA_CACHE_DIR = os.path.join(".cache", "schema")
+SCHEMA_MAX_AGE = 24 * 60 * 60
+
+# A failed metadata fetch is retried after this many seconds
+SCHEMA_RETRY_AFTER = 30
+
+# Strings longer than this get a text area instead of a text input
+TEXT_AREA_LENGTH = 255
+
+NUMERIC_TYPES = {
+    "esriFieldTypeSmallInteger",
+    "esriFieldTypeInteger",
+    "esriFieldTypeBigInteger",
+    "esriFieldTypeSingle",
+    "esriFieldTypeDouble",
+    "esriFieldTypeOID",
+}
+INTEGER_TYPES = {
+    "esriFieldTypeSmallInteger",
+    "esriFieldTypeInteger",
+    "esriFieldTypeBigInteger",
+    "esriFieldTypeOID",
+}
+DATE_TYPES = {"esriFieldTypeDate", "esriFieldTypeDateOnly"}
+
+# url → time of the last failed metadata fetch
+_schema_failures = {}
+
+
+
+# ---------------------------------------------------------
+# Field / layer schema
+# ---------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class FieldInfo:
+    name: str
+    type: str
+    alias: str = ""
+    length: Optional[int] = None
+    nullable: bool = True
+    editable: bool = True
+    domain: Optional[dict] = None   # coded value → display name
+
+    @classmethod
+    def from_json(cls, field: dict) -> "FieldInfo":
+        domain = field.get("domain") or {}
+        coded = None
+        if domain.get("type") == "codedValue":
+            coded = {cv["code"]: cv["name"] for cv in domain.get("codedValues", [])}
+
+        return cls(
+            name=field["name"],
+            type=field.get("type", "esriFieldTypeString"),
+            alias=field.get("alias") or field["name"],
+            length=field.get("length"),
+            nullable=field.get("nullable", True),
+            editable=field.get("editable", True),
+            domain=coded
+        )
+
+    @property
+    def widget_type(self) -> str:
+        if self.domain:
+            return "select"
+        if self.type in DATE_TYPES:
+            return "date"
+        if self.type in NUMERIC_TYPES:
+            return "number"
+        if self.type == "esriFieldTypeString" and (self.length or 0) > TEXT_AREA_LENGTH:
+            return "text_area"
+        return "text"
+
+
+class LayerSchema:
+    """Field metadata for one layer, keyed by lower-case field name."""
+
+    def __init__(self, url: str, fields: list, geometry_type: str = None, edit_date_field: str = None):
+        self.url = url
+        self.fields = {f.name.lower(): f for f in fields}
+        self.geometry_type = geometry_type
+        self.edit_date_field = edit_date_field
+
+    @classmethod
+    def from_metadata(cls, url: str, metadata: dict) -> "LayerSchema":
+        return cls(
+            url,
+            [FieldInfo.from_json(f) for f in metadata.get("fields", [])],
+            geometry_type=metadata.get("geometryType"),
+            edit_date_field=(metadata.get("editFieldsInfo") or {}).get("editDateField")
+        )
+
+    def field(self, name: str) -> Optional[FieldInfo]:
+        return self.fields.get(name.lower())
+
+    def widget_type(self, name: str, default: str = "text") -> str:
+        info = self.field(name)
+        return info.widget_type if info else default
+
+    def options(self, name: str) -> list:
+        info = self.field(name)
+        return list(info.domain.values()) if info and info.domain else []
+
+    def names_of(self, types: set) -> list:
+        return [f.name for f in self.fields.values() if f.type in types]
+
+
+
+# ---------------------------------------------------------
+# Disk + process cache
+# ---------------------------------------------------------
+def _cache_path(url: str) -> str:
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(SCHEMA_CACHE_DIR, f"{digest}.json")
+
+
+def _read_disk_cache(url: str) -> Optional[dict]:
+    path = _cache_path(url)
+    try:
+        if time.time() - os.path.getmtime(path) > SCHEMA_MAX_AGE:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_disk_cache(url: str, metadata: dict):
+    try:
+        os.makedirs(SCHEMA_CACHE_DIR, exist_ok=True)
+        keep = {
+            "fields": metadata.get("fields", []),
+            "geometryType": metadata.get("geometryType"),
+            "editFieldsInfo": metadata.get("editFieldsInfo")
+        }
+        with open(_cache_path(url), "w", encoding="utf-8") as f:
+            json.dump(keep, f)
+    except OSError as e:
+        logger.warning("Could not write schema cache for %s: %s", url, e)
+
+
+@st.cache_resource(show_spinner=False)
+def _load_layer_schema(url: str) -> LayerSchema:
+    """Cached per process; raises (so nothing is cached) when the fetch fails."""
+    metadata = _read_disk_cache(url)
+    if metadata is None:
+        metadata = get_layer_metadata(url)
+        _write_disk_cache(url, metadata)
+
+    return LayerSchema.from_metadata(url, metadata)
+
+
+def get_layer_schema(url: str) -> Optional[LayerSchema]:
+    """
+    Fetch a layer's field schema once per process (and once per day on disk).
+    Returns None when the metadata endpoint can't be reached; the fetch is
+    retried after SCHEMA_RETRY_AFTER seconds rather than cached as missing.
+    """
+    failed_at = _schema_failures.get(url)
+    if failed_at is not None and time.time() - failed_at < SCHEMA_RETRY_AFTER:
+        return None
+
+    try:
+        schema = _load_layer_schema(url)
+    except Exception as e:
+        logger.warning("Schema unavailable for %s: %s", url, e)
+        _schema_failures[url] = time.time()
+        return None
+
+    _schema_failures.pop(url, None)
+    return schema
+
+
+
+# ---------------------------------------------------------
+# Vectorized coercion
+# ---------------------------------------------------------
+def epoch_ms_to_date(values) -> pd.Series:
+    """Epoch milliseconds (or ISO strings) → datetime.date, NaT → None."""
+    series = pd.Series(values)
+    numeric = pd.to_numeric(series, errors="coerce")
+    parsed = pd.to_datetime(numeric, unit="ms", utc=True, errors="coerce")
+
+    # Fall back to string parsing for anything that wasn't epoch-ms
+    text_mask = parsed.isna() & series.notna()
+    if text_mask.any():
+        parsed[text_mask] = pd.to_datetime(series[text_mask], utc=True, errors="coerce")
+
+    return parsed.dt.date.astype(object).where(parsed.notna(), None)
+
+
+def date_to_epoch_ms(values) -> pd.Series:
+    """datetime.date / datetime / ISO strings → epoch milliseconds (Int64)."""
+    series = pd.Series(values)
+
+    # Values that are already epoch-ms pass straight through
+    numeric = pd.to_numeric(series, errors="coerce")
+    parsed = pd.to_datetime(series.where(numeric.isna()), utc=True, errors="coerce")
+    ms = (parsed - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)
+
+    return numeric.round().astype("Int64").fillna(ms.astype("Int64"))
+
+
+def date_to_iso(values) -> pd.Series:
+    """Dates / epoch-ms / ISO strings → 'YYYY-MM-DD' (DateOnly fields), NaT → None."""
+    return epoch_ms_to_date(values).map(lambda d: d.isoformat() if d is not None else None)
+
+
+def to_date(value) -> Optional[date]:
+    """Scalar convenience wrapper used by the date widgets."""
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if value is None or value == "":
+        return None
+    return epoch_ms_to_date([value]).iloc[0]
+
+
+def coerce_frame(df: pd.DataFrame, schema: Optional[LayerSchema], to_agol: bool = False) -> pd.DataFrame:
+    """
+    Coerce every schema-typed column of a frame in one pass.
+
+    to_agol=False: epoch-ms → date, numeric strings → numbers, domain codes → names
+    to_agol=True:  dates → epoch-ms ('YYYY-MM-DD' for DateOnly), numeric strings → numbers,
+                   domain names → codes
+    """
+    if schema is None or df.empty:
+        return df
+
+    out = df.copy()
+    for column in out.columns:
+        info = schema.field(column)
+        if info is None:
+            continue
+
+        # Names → codes first, so numeric coercion sees the codes
+        if info.domain and to_agol:
+            mapping = {v: k for k, v in info.domain.items()}
+            out[column] = out[column].map(lambda v: mapping.get(v, v))
+
+        if info.type == "esriFieldTypeDateOnly":
+            # DateOnly fields take 'YYYY-MM-DD' strings, not epoch-ms
+            out[column] = date_to_iso(out[column]).values if to_agol \
+                else epoch_ms_to_date(out[column]).values
+
+        elif info.type in DATE_TYPES:
+            out[column] = date_to_epoch_ms(out[column]).values if to_agol \
+                else epoch_ms_to_date(out[column]).values
+
+        elif info.type in NUMERIC_TYPES:
+            numeric = pd.to_numeric(out[column].replace({"": np.nan, "None": np.nan}), errors="coerce")
+            out[column] = numeric.round().astype("Int64") if info.type in INTEGER_TYPES else numeric
+
+        if info.domain and not to_agol:
+            out[column] = out[column].map(lambda v: info.domain.get(v, v))
+
+    return out
+
+
+def coerce_record(attributes: dict, schema: Optional[LayerSchema], to_agol: bool = False) -> dict:
+    """Single-record variant of coerce_frame returning plain Python values."""
+    if not attributes:
+        return dict(attributes)
+
+    # Without a schema, still send date widgets' values as epoch-ms
+    if schema is None:
+        if not to_agol:
+            return dict(attributes)
+        return {
+            k: int(date_to_epoch_ms([v]).iloc[0]) if isinstance(v, date) else v
+            for k, v in attributes.items()
+        }
+
+    frame = coerce_frame(pd.DataFrame([attributes]), schema, to_agol=to_agol)
+    row = frame.astype(object).where(frame.notna(), None).iloc[0]
+    return {k: (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()}
@@ -0,0 +1,121 @@
+import folium
+import shapely
+import streamlit as st
+from shapely.geometry import mapping, shape
+from streamlit_folium import st_folium
+
+from agol_util import select_record
+from esri_geojson import esri_to_geojson
+from layer_schema import get_layer_schema
+
+
+# Zoom levels that get their own simplified copy; deeper zooms get full detail
+SIMPLIFY_ZOOMS = (4, 7, 10, 13)
+
+# Fallback refresh for layers without an edit-date field
+GEOMETRY_TTL = 15 * 60
+
+DEFAULT_ZOOM = 10
+
+# How long an edit-date lookup is reused before AGOL is asked again
+EDIT_DATE_TTL = 60
+
+
+
+def _tolerance(zoom: int) -> float:
+    """Roughly one 256px web-mercator tile pixel, in degrees, at this zoom."""
+    return 360.0 / (256 * 2 ** zoom)
+
+
+def level_for_zoom(zoom) -> int:
+    """Coarsest prepared level that is still sharp at this zoom (None = full detail)."""
+    if zoom is None:
+        return None
+    return next((z for z in SIMPLIFY_ZOOMS if z >= zoom), None)
+
+
+
+# ---------------------------------------------------------
+# Geometry preparation (cached per GUID + edit date)
+# ---------------------------------------------------------
+@st.cache_data(ttl=EDIT_DATE_TTL, max_entries=256, show_spinner=False)
+def project_edit_date(url: str, guid: str):
+    """
+    Cheap attribute-only lookup of the record's last edit time, reused for
+    EDIT_DATE_TTL so reruns don't each send a query just for the cache key.
+    """
+    schema = get_layer_schema(url)
+    if schema is None or not schema.edit_date_field:
+        return None
+
+    features = select_record(url, "globalid", guid, fields=schema.edit_date_field, return_geometry=False)
+    if not features:
+        return None
+    attributes = features[0].get("attributes", {})
+    return next((v for k, v in attributes.items() if k.lower() == schema.edit_date_field.lower()), None)
+
+
+@st.cache_data(ttl=GEOMETRY_TTL, max_entries=64, show_spinner="Preparing geometry...")
+def project_geometry_levels(url: str, guid: str, edit_date) -> dict:
+    """
+    Fetch a project's geometry once and pre-simplify it for each zoom level.
+    edit_date is only part of the cache key, so an edit invalidates it.
+    """
+    features = select_record(url, "globalid", guid, fields="OBJECTID", return_geometry=True)
+    geojson = esri_to_geojson(features[0].get("geometry")) if features else None
+    if geojson is None:
+        return None
+
+    geom = shape(geojson)
+    levels = {None: geojson}
+    for zoom in SIMPLIFY_ZOOMS:
+        simplified = geom.simplify(_tolerance(zoom), preserve_topology=True)
+        levels[zoom] = mapping(simplified)
+
+    minx, miny, maxx, maxy = geom.bounds
+    return {
+        "bounds": [[miny, minx], [maxy, maxx]],
+        "vertices": int(shapely.get_num_coordinates(geom)),
+        "levels": levels
+    }
+
+
+
+# ---------------------------------------------------------
+# Map renderer
+# ---------------------------------------------------------
+@st.fragment
+def render_project_map(url: str, guid: str, key: str = "geometry_map"):
+    """
+    A fragment: zooming reruns only the map (to pick the simplified level),
+    not the project list, tabs and prefetch of the whole app.
+    """
+    prepared = project_geometry_levels(url, guid, project_edit_date(url, guid))
+    if prepared is None:
+        st.info("This project has no geometry.")
+        return
+
+    # st_folium keeps the last reported view in session_state[key]
+    view = st.session_state.get(key) or {}
+    zoom = view.get("zoom")
+    level = level_for_zoom(zoom if zoom is not None else DEFAULT_ZOOM)
+
+    m = folium.Map(tiles="OpenStreetMap")
+    m.fit_bounds(prepared["bounds"])
+
+    # Only the geometry layer changes with zoom; the base map is not re-sent
+    layer = folium.FeatureGroup(name="Project")
+    folium.GeoJson(prepared["levels"][level], name="Project").add_to(layer)
+
+    st_folium(
+        m,
+        key=key,
+        feature_group_to_add=layer,
+        returned_objects=["zoom"],
+        use_container_width=True,
+        height=500
+    )
+    st.caption(
+        f"{prepared['vertices']:,} vertices · "
+        f"{'full detail' if level is None else f'simplified for zoom ≤ {level}'}"
+    )
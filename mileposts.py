@@ -0,0 +1,221 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import streamlit as st
+
+from agol_util import query_features
+
+
+logger = logging.getLogger("mileposts")
+
+# Fields on the milepost layer
+ROUTE_FIELD = "ROUTE_ID"
+MEASURE_FIELD = "MILEPOST"
+
+# Mean earth radius in miles (local equirectangular projection per route)
+EARTH_RADIUS_MI = 3958.8
+
+# Maximum (points × segments) evaluated at once when snapping batches
+SNAP_BLOCK = 2_000_000
+
+
+
+# ---------------------------------------------------------
+# One route: milepost measures and coordinates sorted by measure
+# ---------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class RouteMeasures:
+    route: str
+    measures: np.ndarray   # (n,) ascending
+    lon: np.ndarray        # (n,)
+    lat: np.ndarray        # (n,)
+    scale_x: float         # miles per degree of longitude at this route's latitude
+
+    @property
+    def xy(self) -> np.ndarray:
+        """Planar coordinates in miles, shape (n, 2)."""
+        return np.column_stack([
+            self.lon * self.scale_x,
+            self.lat * np.radians(1) * EARTH_RADIUS_MI
+        ])
+
+    @property
+    def begin(self) -> float:
+        return float(self.measures[0])
+
+    @property
+    def end(self) -> float:
+        return float(self.measures[-1])
+
+
+class MilepostIndex:
+    """
+    In-memory linear-referencing index over the milepost layer.
+
+    Route geometry is approximated by the polyline through consecutive
+    mileposts, so every lookup is a numpy operation on that route's arrays.
+    """
+
+    def __init__(self, routes: dict):
+        self.routes = routes
+
+    @classmethod
+    def from_features(cls, features) -> "MilepostIndex":
+        grouped = {}
+        for feature in features:
+            attributes = feature.get("attributes", {})
+            geometry = feature.get("geometry") or {}
+            route = attributes.get(ROUTE_FIELD)
+            measure = attributes.get(MEASURE_FIELD)
+            if route is None or measure is None or geometry.get("x") is None:
+                continue
+            grouped.setdefault(str(route), []).append((float(measure), geometry["x"], geometry["y"]))
+
+        routes = {}
+        for route, rows in grouped.items():
+            data = np.array(rows, dtype=float)
+            data = data[np.argsort(data[:, 0], kind="stable")]
+
+            # Duplicate measures would make interpolation ambiguous
+            _, first = np.unique(data[:, 0], return_index=True)
+            data = data[first]
+
+            lat0 = np.radians(data[:, 2].mean())
+            routes[route] = RouteMeasures(
+                route=route,
+                measures=data[:, 0],
+                lon=data[:, 1],
+                lat=data[:, 2],
+                scale_x=float(np.radians(1) * EARTH_RADIUS_MI * np.cos(lat0))
+            )
+
+        return cls(routes)
+
+    @classmethod
+    def from_layer(cls, url: str, where: str = "1=1") -> "MilepostIndex":
+        def features():
+            for page in query_features(url, where=where, fields=[ROUTE_FIELD, MEASURE_FIELD],
+                                       return_geometry=True):
+                yield from page
+
+        return cls.from_features(features())
+
+    def route(self, route: str) -> RouteMeasures:
+        try:
+            return self.routes[str(route)]
+        except KeyError:
+            raise ValueError(f"Unknown route: {route}")
+
+    def route_names(self) -> list:
+        return sorted(self.routes)
+
+    # ---------------------------------------------------------
+    # Measure → geometry
+    # ---------------------------------------------------------
+    def locate(self, route: str, measures) -> np.ndarray:
+        """Interpolate (lon, lat) for one or many measures; returns (n, 2)."""
+        rm = self.route(route)
+        m = np.clip(np.atleast_1d(np.asarray(measures, dtype=float)), rm.begin, rm.end)
+        return np.column_stack([np.interp(m, rm.measures, rm.lon), np.interp(m, rm.measures, rm.lat)])
+
+    def segment(self, route: str, begin: float, end: float) -> list:
+        """Polyline [[lon, lat], ...] between two measures (direction follows begin → end)."""
+        rm = self.route(route)
+        lo, hi = sorted((float(begin), float(end)))
+        lo, hi = max(lo, rm.begin), min(hi, rm.end)
+        if lo >= hi:
+            raise ValueError(f"Measures {begin}–{end} fall outside route {route} ({rm.begin}–{rm.end})")
+
+        inside = (rm.measures > lo) & (rm.measures < hi)
+        ends = self.locate(route, [lo, hi])
+        coords = np.vstack([ends[:1], np.column_stack([rm.lon[inside], rm.lat[inside]]), ends[1:]])
+        if begin > end:
+            coords = coords[::-1]
+        return coords.tolist()
+
+    def segments(self, route: str, begins, ends) -> list:
+        """Batch version of segment()."""
+        return [self.segment(route, b, e) for b, e in zip(begins, ends)]
+
+    # ---------------------------------------------------------
+    # Geometry → measure
+    # ---------------------------------------------------------
+    def _snap(self, rm: RouteMeasures, lon, lat):
+        """Vectorized projection of points onto the route polyline."""
+        pts = np.column_stack([
+            np.asarray(lon, dtype=float) * rm.scale_x,
+            np.asarray(lat, dtype=float) * np.radians(1) * EARTH_RADIUS_MI
+        ])
+        xy = rm.xy
+
+        if len(xy) == 1:
+            dist = np.linalg.norm(pts - xy[0], axis=1)
+            return np.full(len(pts), rm.begin), dist, np.repeat(xy[:1], len(pts), axis=0)
+
+        a, b = xy[:-1], xy[1:]
+        ab = b - a
+        ab_len2 = np.maximum((ab ** 2).sum(axis=1), 1e-12)
+
+        best_measure = np.empty(len(pts))
+        best_dist = np.empty(len(pts))
+        best_xy = np.empty((len(pts), 2))
+
+        # Process points in blocks so (points × segments) stays bounded
+        block = max(1, SNAP_BLOCK // len(a))
+        for start in range(0, len(pts), block):
+            p = pts[start:start + block, None, :]                     # (k, 1, 2)
+            t = np.clip(((p - a) * ab).sum(axis=2) / ab_len2, 0, 1)    # (k, s)
+            proj = a + t[..., None] * ab                               # (k, s, 2)
+            d = np.linalg.norm(p - proj, axis=2)                       # (k, s)
+            seg = d.argmin(axis=1)
+            rows = np.arange(len(seg))
+
+            m0, m1 = rm.measures[seg], rm.measures[seg + 1]
+            best_measure[start:start + block] = m0 + t[rows, seg] * (m1 - m0)
+            best_dist[start:start + block] = d[rows, seg]
+            best_xy[start:start + block] = proj[rows, seg]
+
+        return best_measure, best_dist, best_xy
+
+    def measure(self, route: str, lon, lat) -> dict:
+        """Measures, offsets (miles) and snapped (lon, lat) for one or many points."""
+        rm = self.route(route)
+        lon, lat = np.atleast_1d(lon), np.atleast_1d(lat)
+        measures, dist, snapped = self._snap(rm, lon, lat)
+
+        return {
+            "measure": measures,
+            "offset_mi": dist,
+            "snapped": np.column_stack([
+                snapped[:, 0] / rm.scale_x,
+                snapped[:, 1] / (np.radians(1) * EARTH_RADIUS_MI)
+            ])
+        }
+
+    def measure_segments(self, route: str, lines: list) -> np.ndarray:
+        """
+        Begin/end measures for a batch of line geometries ([[lon, lat], ...]).
+        Every endpoint is snapped in a single vectorized call; returns (n, 2).
+        """
+        if not lines:
+            return np.empty((0, 2))
+        endpoints = np.array([[line[0], line[-1]] for line in lines], dtype=float).reshape(-1, 2)
+        measures = self.measure(route, endpoints[:, 0], endpoints[:, 1])["measure"]
+        return measures.reshape(-1, 2)
+
+    def nearest_route(self, lon: float, lat: float, max_offset_mi: float = 1.0):
+        """(route, measure, offset) of the closest route within max_offset_mi, or None."""
+        best = None
+        for name, rm in self.routes.items():
+            measures, dist, _ = self._snap(rm, [lon], [lat])
+            if dist[0] <= max_offset_mi and (best is None or dist[0] < best[2]):
+                best = (name, float(measures[0]), float(dist[0]))
+        return best
+
+
+
+@st.cache_resource(show_spinner="Loading mileposts...")
+def get_milepost_index(url: str) -> MilepostIndex:
+    """Milepost index shared by every session; built once per process."""
+    return MilepostIndex.from_layer(url)
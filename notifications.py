@@ -0,0 +1,35 @@
+import streamlit as st
+
+
+ICONS = {
+    "success": "✅",
+    "error": "🚨",
+    "warning": "⚠️",
+    "info": "ℹ️",
+}
+
+QUEUE_KEY = "pending_notifications"
+
+
+
+# ---------------------------------------------------------
+# Toast notifications (expire in the browser, no reruns)
+# ---------------------------------------------------------
+def notify(message: str, kind: str = "info", defer: bool = False):
+    """
+    Show a toast. Toasts disappear on the client, so showing one never
+    costs a script rerun.
+
+    defer=True queues the toast for the next run instead; use it when
+    the caller is about to st.rerun() and would otherwise drop it.
+    """
+    if defer:
+        st.session_state.setdefault(QUEUE_KEY, []).append((message, kind))
+        return
+    st.toast(message, icon=ICONS.get(kind))
+
+
+def flush_notifications():
+    """Show toasts queued with defer=True. Called once per run from app.py."""
+    for message, kind in st.session_state.pop(QUEUE_KEY, []):
+        notify(message, kind)
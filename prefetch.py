@@ -0,0 +1,157 @@
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from agol_util import local_mirror_for, select_record
+from record_store import ProjectRecord, get_record_store
+
+
+logger = logging.getLogger("prefetch")
+
+# Records younger than this are served from the store without a fetch
+RECORD_MAX_AGE = 5 * 60
+
+# Candidates per project switch
+PREFETCH_NEIGHBORS = 2        # projects either side in name order
+PREFETCH_HISTORY = 5          # most recently viewed projects
+
+# Budget per scheduling round
+PREFETCH_MAX_ENTRIES = 8
+PREFETCH_MAX_BYTES = 2 * 1024 * 1024
+
+PREFETCH_WORKERS = 2
+
+
+
+def session_id() -> str:
+    return st.session_state.setdefault("session_id", uuid.uuid4().hex)
+
+
+def remember_project(guid: str, limit: int = PREFETCH_HISTORY):
+    """Track the session's recently viewed projects (most recent first)."""
+    history = [g for g in st.session_state.get("project_history", []) if g != guid]
+    st.session_state["project_history"] = [guid, *history][:limit]
+
+
+
+# ---------------------------------------------------------
+# Prefetcher
+# ---------------------------------------------------------
+class Prefetcher:
+    """
+    Warms the shared RecordStore in the background with the projects a
+    session is likely to open next.
+
+    Each session has at most one active round. Scheduling a new round
+    (the user switched project) cancels the previous one: queued fetches
+    are dropped and in-flight ones discard their result.
+    """
+
+    def __init__(self, max_workers: int = PREFETCH_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._rounds = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def candidates(current: str, ordered: list, history: list) -> list:
+        """Recent history first, then neighbours in name order, de-duplicated."""
+        picks = [g for g in history if g != current]
+
+        if current in ordered:
+            i = ordered.index(current)
+            for step in range(1, PREFETCH_NEIGHBORS + 1):
+                picks.extend(ordered[j] for j in (i + step, i - step) if 0 <= j < len(ordered))
+
+        return list(dict.fromkeys(g for g in picks if g and g != current))
+
+    def cancel(self, sid: str):
+        with self._lock:
+            previous = self._rounds.pop(sid, None)
+        if previous:
+            previous["cancelled"].set()
+            for future in previous["futures"]:
+                future.cancel()
+
+    def schedule(self, sid: str, url: str, current: str, ordered: list, history: list,
+                 fields="*", max_entries: int = PREFETCH_MAX_ENTRIES,
+                 max_bytes: int = PREFETCH_MAX_BYTES):
+        # Reruns of the same project keep the round that's already running
+        with self._lock:
+            active = self._rounds.get(sid)
+        if active and active["current"] == current and not all(f.done() for f in active["futures"]):
+            return
+
+        self.cancel(sid)
+
+        store = get_record_store()
+        todo = [
+            g for g in self.candidates(current, ordered, history)
+            if store.get(url, g, RECORD_MAX_AGE, fields=fields) is None
+        ][:max_entries]
+        if not todo:
+            return
+
+        round_state = {
+            "current": current,
+            "cancelled": threading.Event(),
+            "bytes": 0,
+            "futures": [],
+            "lock": threading.Lock(),
+        }
+        round_state["futures"] = [
+            self._executor.submit(self._fetch, store, url, guid, fields, round_state, max_bytes)
+            for guid in todo
+        ]
+        with self._lock:
+            self._rounds[sid] = round_state
+
+    def _fetch(self, store, url: str, guid: str, fields, round_state: dict, max_bytes: int):
+        if round_state["cancelled"].is_set():
+            return
+        with round_state["lock"]:
+            if round_state["bytes"] >= max_bytes:
+                return
+
+        try:
+            features = select_record(url, "globalid", guid, fields=fields, return_geometry=False)
+        except Exception as e:
+            logger.debug("Prefetch of %s failed: %s", guid, e)
+            return
+
+        if not features or round_state["cancelled"].is_set():
+            return
+
+        size = len(json.dumps(features[0].get("attributes", {}), default=str))
+        with round_state["lock"]:
+            if round_state["bytes"] + size > max_bytes:
+                return
+            round_state["bytes"] += size
+
+        store.put(ProjectRecord.from_feature(url, guid, features[0], fields))
+
+
+@st.cache_resource
+def get_prefetcher() -> Prefetcher:
+    return Prefetcher()
+
+
+def prefetch_likely_next(url: str, current: str, ordered: list):
+    """Called after a project renders; returns immediately."""
+    remember_project(current)
+
+    # Records come from the local mirror anyway; nothing to warm
+    mirror, _ = local_mirror_for(url, st.session_state.get("use_local_mirror", False))
+    if mirror is not None:
+        return
+
+    get_prefetcher().schedule(
+        session_id(),
+        url,
+        current,
+        ordered,
+        st.session_state.get("project_history", [])
+    )
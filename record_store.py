@@ -0,0 +1,212 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+import streamlit as st
+
+from agol_query import canonical_fields
+
+
+# Prefixes whose session keys belong to the currently loaded project.
+# Everything under these prefixes is dropped when the user switches GUID.
+PROJECT_PREFIXES = ("information", "aashtoware")
+
+# Maximum number of project records held in the process-wide store
+MAX_RECORDS = 256
+
+
+
+# ---------------------------------------------------------
+# Compact, immutable record shared by every session
+# ---------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class ProjectRecord:
+    """
+    Read-only snapshot of a single AGOL feature.
+
+    Attribute names are lower-cased once on creation so lookups from the
+    UI (which always uses lower-case field names) are a single dict hit.
+    `fields` (None = every field) and `has_geometry` record what the
+    request fetched, so a reduced record is never served as a full one.
+    """
+    url: str
+    guid: str
+    attributes: Mapping[str, Any]
+    geometry: Optional[dict] = None
+    fields: Optional[frozenset] = None
+    has_geometry: bool = False
+
+    @classmethod
+    def from_feature(cls, url: str, guid: str, feature: dict, fields="*",
+                     return_geometry: bool = False) -> "ProjectRecord":
+        attributes = {k.lower(): v for k, v in (feature.get("attributes") or {}).items()}
+        fetched = canonical_fields(fields)
+        return cls(
+            url=url,
+            guid=guid,
+            attributes=MappingProxyType(attributes),
+            geometry=feature.get("geometry"),
+            fields=None if fetched == "*" else frozenset(fetched.split(",")),
+            has_geometry=bool(return_geometry)
+        )
+
+    @property
+    def key(self) -> tuple:
+        return (self.url, self.guid)
+
+    def covers(self, fields="*", return_geometry: bool = False) -> bool:
+        """True when this record holds everything a request for fields/geometry would."""
+        if return_geometry and not self.has_geometry:
+            return False
+        if self.fields is None:
+            return True
+        wanted = canonical_fields(fields)
+        return wanted != "*" and set(wanted.split(",")) <= self.fields
+
+    def covers_record(self, other: "ProjectRecord") -> bool:
+        return self.covers("*" if other.fields is None else other.fields, other.has_geometry)
+
+    def get(self, field: str, default=None):
+        return self.attributes.get(field.lower(), default)
+
+
+
+# ---------------------------------------------------------
+# Process-wide LRU store keyed by (layer url, GUID)
+# ---------------------------------------------------------
+class RecordStore:
+    """
+    Bounded store of ProjectRecords shared by all sessions.
+
+    Sessions hold a reference to the record instead of copying every
+    attribute into their own session_state.
+    """
+
+    def __init__(self, max_entries: int = MAX_RECORDS):
+        self.max_entries = max_entries
+        self._records = OrderedDict()
+        self._fetched_at = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, guid: str, max_age: float = None, fields="*",
+            return_geometry: bool = False) -> Optional[ProjectRecord]:
+        """
+        Stored record, or None when missing, older than max_age seconds or
+        fetched with fewer fields (or without the geometry) than requested.
+        """
+        with self._lock:
+            record = self._records.get((url, guid))
+            if record is None or not record.covers(fields, return_geometry):
+                return None
+            if max_age is not None and time.time() - self._fetched_at[(url, guid)] > max_age:
+                return None
+            self._records.move_to_end((url, guid))
+            return record
+
+    def put(self, record: ProjectRecord) -> ProjectRecord:
+        with self._lock:
+            existing = self._records.get(record.key)
+
+            # A narrower fetch (e.g. a prefetch without geometry) only
+            # refreshes the attributes it holds; the wider record stays
+            if existing is not None and not record.covers_record(existing):
+                merged = {**existing.attributes, **record.attributes}
+                record = replace(existing, attributes=MappingProxyType(merged))
+                if record == existing:
+                    return existing
+                self._records[record.key] = record
+                return record
+
+            self._fetched_at[record.key] = time.time()
+
+            # Re-use the existing object when nothing changed so every
+            # session keeps pointing at the same instance
+            if existing is not None and existing == record:
+                self._records.move_to_end(record.key)
+                return existing
+
+            self._records[record.key] = record
+            self._records.move_to_end(record.key)
+            while len(self._records) > self.max_entries:
+                key, _ = self._records.popitem(last=False)
+                self._fetched_at.pop(key, None)
+            return record
+
+    def merge(self, url: str, guid: str, attributes: dict) -> Optional[ProjectRecord]:
+        """
+        Replace a few attributes of a stored record (e.g. after one card
+        was saved and re-read) without refetching the whole feature.
+        Returns the new record, or None when nothing is stored.
+        """
+        with self._lock:
+            record = self._records.get((url, guid))
+        if record is None:
+            return None
+
+        merged = {**record.attributes, **{k.lower(): v for k, v in attributes.items()}}
+        return self.put(replace(record, attributes=MappingProxyType(merged)))
+
+    def evict(self, guid: str):
+        with self._lock:
+            for key in [k for k in self._records if k[1] == guid]:
+                del self._records[key]
+                self._fetched_at.pop(key, None)
+
+    def __contains__(self, key: tuple):
+        return key in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+
+@st.cache_resource
+def get_record_store() -> RecordStore:
+    return RecordStore()
+
+
+
+# ---------------------------------------------------------
+# Session helpers
+# ---------------------------------------------------------
+def session_record(prefix: str) -> Optional[ProjectRecord]:
+    """Return the record referenced by the session for a given prefix."""
+    prefix = prefix.rstrip("_") + "_" if prefix else ""
+    return st.session_state.get(f"{prefix}record")
+
+
+def get_field_value(prefix: str, field_name: str, default=None):
+    """
+    Current value for a field: the user's pending edit when one exists,
+    otherwise the value from the shared record.
+    """
+    data_key = f"{prefix}_{field_name}"
+    if data_key in st.session_state:
+        return st.session_state[data_key]
+
+    record = session_record(prefix)
+    if record is None:
+        return default
+    return record.get(field_name, default)
+
+
+def evict_stale_project(new_guid: Optional[str]):
+    """
+    Drop every session key that belongs to the previously loaded project.
+    Called when the user switches to a different GUID.
+    """
+    loaded_guid = st.session_state.get("loaded_guid")
+    if loaded_guid == new_guid:
+        return
+
+    stale_keys = [
+        key for key in list(st.session_state.keys())
+        if isinstance(key, str) and key.startswith(PROJECT_PREFIXES)
+    ]
+    for key in stale_keys:
+        del st.session_state[key]
+
+    st.session_state.pop("last_update", None)
+    st.session_state["loaded_guid"] = new_guid
@@ -0,0 +1,43 @@
+import pandas as pd
+import streamlit as st
+
+from mileposts import get_milepost_index
+
+
+def routes_tab():
+
+    st.write('')
+    st.markdown("<h4>ROUTES 🛣️</h4>", unsafe_allow_html=True)
+    st.write("Locate a route segment from its begin and end mileposts.")
+
+    try:
+        index = get_milepost_index(st.session_state["mileposts"])
+    except Exception as e:
+        st.error(f"Failed to load mileposts: {e}")
+        return
+
+    route_names = index.route_names()
+    if not route_names:
+        st.info("No mileposts available.")
+        return
+
+    route = st.selectbox("Route", route_names, key="routes_route")
+    rm = index.route(route)
+
+    col_begin, col_end = st.columns(2)
+    begin = col_begin.number_input(
+        "Begin Milepost", min_value=rm.begin, max_value=rm.end, value=rm.begin, key="routes_begin"
+    )
+    end = col_end.number_input(
+        "End Milepost", min_value=rm.begin, max_value=rm.end, value=rm.end, key="routes_end"
+    )
+
+    if begin == end:
+        point = index.locate(route, begin)[0]
+        st.caption(f"Point at MP {begin:.2f}: {point[1]:.6f}, {point[0]:.6f}")
+        st.map(pd.DataFrame({"lat": [point[1]], "lon": [point[0]]}))
+        return
+
+    coords = index.segment(route, begin, end)
+    st.caption(f"{abs(end - begin):.2f} miles · {len(coords)} vertices")
+    st.map(pd.DataFrame(coords, columns=["lon", "lat"]))
@@ -0,0 +1,72 @@
+import importlib
+import logging
+import sys
+import time
+
+import streamlit as st
+
+
+logger = logging.getLogger("startup")
+
+# Set when the app first imports this module (cold start of the process)
+PROCESS_STARTED = time.perf_counter()
+
+# Module name → seconds spent on its first import in this process
+IMPORT_TIMES = {}
+
+_cold_start = {"first_paint": None}
+
+
+
+# ---------------------------------------------------------
+# Lazy imports
+# ---------------------------------------------------------
+def lazy_import(name: str):
+    """
+    Import a module on first use and record how long it took. Heavy tab
+    modules (geopandas, shapely, folium, ...) go through here so they are
+    only loaded once the page that needs them renders.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMES[name] = time.perf_counter() - start
+    logger.info("Imported %s in %.0f ms", name, IMPORT_TIMES[name] * 1000)
+    return module
+
+
+
+# ---------------------------------------------------------
+# First paint
+# ---------------------------------------------------------
+def start_run():
+    """Call at the top of app.py on every script run."""
+    st.session_state["run_started"] = time.perf_counter()
+
+
+def mark_first_paint():
+    """
+    Call once the first useful content (project selector or title) is
+    on screen. Records the process cold start once and the session's
+    first paint once.
+    """
+    now = time.perf_counter()
+
+    if _cold_start["first_paint"] is None:
+        _cold_start["first_paint"] = now - PROCESS_STARTED
+        logger.info("Cold start first paint in %.0f ms", _cold_start["first_paint"] * 1000)
+
+    if "first_paint_ms" not in st.session_state:
+        started = st.session_state.get("run_started", now)
+        st.session_state["first_paint_ms"] = round((now - started) * 1000)
+
+
+def startup_report() -> dict:
+    """Snapshot of the process cold-start metrics (milliseconds)."""
+    return {
+        "cold_start_first_paint_ms": round(_cold_start["first_paint"] * 1000) if _cold_start["first_paint"] else None,
+        "imports_ms": {name: round(seconds * 1000) for name, seconds in IMPORT_TIMES.items()},
+    }
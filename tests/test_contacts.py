@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("streamlit")
+
+from contacts import ContactIndex, upsert_contacts
+
+
+PROJECT = "{11111111-2222-3333-4444-555555555555}"
+
+
+def contact(objectid, name, email, agency="DOT&PF"):
+    return (objectid, PROJECT, name, email, agency, None, None, None)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return ContactIndex("https://example.com/arcgis/rest/services/contacts/FeatureServer/0",
+                        path=str(tmp_path / "contacts.sqlite"))
+
+
+def test_edited_contact_is_reindexed(index):
+    with index._connect() as conn:
+        upsert_contacts(conn, [contact(1, "Alice Smith", "alice@example.com")])
+    assert [m["name"] for m in index.search("alice")] == ["Alice Smith"]
+
+    with index._connect() as conn:
+        upsert_contacts(conn, [contact(1, "Bob Jones", "bob@example.com")])
+
+    assert index.search("alice") == []
+    assert [m["name"] for m in index.search("bob")] == ["Bob Jones"]
+    assert len(index.project_contacts(PROJECT)) == 1
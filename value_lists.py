@@ -0,0 +1,74 @@
+import logging
+
+import streamlit as st
+
+from agol_util import get_unique_field_values
+from layer_schema import get_layer_schema
+
+
+logger = logging.getLogger("value_lists")
+
+# How long a value list is shared before it's refreshed from AGOL
+VALUE_LIST_TTL = 60 * 60
+
+# List name → (session_state URL key, field providing the values)
+VALUE_LIST_SOURCES = {
+    "construction_years": ("projects_url", "construction_year"),
+    "phase": ("projects_url", "phase"),
+    "funding": ("projects_url", "fund_type"),
+    "practice": ("projects_url", "proj_prac"),
+    "fiscal_year": ("projects_url", "award_fiscal_year"),
+}
+
+# Used until the service answers (or when it can't be reached)
+DEFAULT_VALUE_LISTS = {
+    "construction_years": ("CY2025", "CY2026", "CY2027", "CY2028", "CY2029", "CY2030"),
+    "phase": ("Planning", "Construction"),
+    "funding": ("FHWY", "FHWA", "FAA", "STATE", "OTHER"),
+    "practice": ("Highways", "Aviation", "Facilities", "Marine Highway", "Other"),
+    "fiscal_year": ("2020", "2021", "2022", "2023", "2024", "2025", "2026", "2027", "2028", "2029", "2030"),
+}
+
+
+
+# ---------------------------------------------------------
+# Process-wide value list loader
+# ---------------------------------------------------------
+@st.cache_resource(ttl=VALUE_LIST_TTL, show_spinner=False)
+def load_value_list(url: str, field: str, fallback: tuple = ()) -> tuple:
+    """
+    Options for a field, shared by every session for VALUE_LIST_TTL seconds.
+
+    Coded-value domains from the layer schema are preferred; otherwise the
+    distinct values currently stored in the layer are used. Returned as a
+    tuple so sessions can share it without copying.
+    """
+    schema = get_layer_schema(url)
+    if schema is not None:
+        options = schema.options(field)
+        if options:
+            return tuple(options)
+
+    try:
+        values = get_unique_field_values(url, field, sort_type="alpha")
+    except Exception as e:
+        logger.warning("Value list for %s unavailable, using defaults: %s", field, e)
+        return tuple(fallback)
+
+    options = tuple(str(v) for v in values if v not in (None, ""))
+    return options or tuple(fallback)
+
+
+def value_list(name: str) -> tuple:
+    """Look up a named value list (e.g. "phase", "funding")."""
+    fallback = DEFAULT_VALUE_LISTS.get(name, ())
+    source = VALUE_LIST_SOURCES.get(name)
+    if source is None:
+        return fallback
+
+    url_key, field = source
+    url = st.session_state.get(url_key)
+    if not url:
+        return fallback
+
+    return load_value_list(url, field, fallback)